@@ -15,6 +15,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 from scipy.integrate import simps
 
+from Filters import Kernel
+
 
 # =============================================================================
 # FILTER
@@ -53,6 +55,25 @@ class Filter():
         if (self.Width is None):
             self.Width = self.getWidth() # m
         
+        # Integration kernel of the filter. The kernel on the full filter
+        # nodes is kept so that the filter nodes can be reduced again with
+        # another tolerance.
+        self.Kernel = Kernel.Kernel(self.Wavel, # m
+                                    self.Trans,
+                                    self.Width, # m
+                                    self.Mean) # m
+        self.FullKernel = self.Kernel
+        
+        # Temperature-indexed lookup tables of the integrated blackbody flux
+        # (one per unit), filled by PhotometryComputer on its own copy of the
+        # filter if requested.
+        self.LUT = {}
+        
+        # Integrated flux of a blackbody with unit solid angle for each
+        # distinct stellar effective temperature, keyed by (Ts, unit, dtype).
+        # Shared by all modules which need the integrated host star flux.
+        self.StarCache = {}
+        
         # Print.
         print('--> Initializing Filter '+self.Name)
         print('Mean wavelength = %.3f microns' % (self.Mean*1e6))
@@ -84,6 +105,162 @@ class Filter():
         
         return Width
     
+    def Reduce(self,
+               RelTol=1e-6,
+               Tmin=50., # K
+               Tmax=50000., # K
+               Ntemp=60,
+               Nmax=100):
+        """
+        Parameters
+        ----------
+        RelTol: float
+            Max relative error of the integrated blackbody flux on the reduced
+            filter nodes.
+        Tmin: float
+            Min reference temperature (K).
+        Tmax: float
+            Max reference temperature (K).
+        Ntemp: int
+            Number of reference temperatures.
+        Nmax: int
+            Max number of reduced filter nodes.
+        """
+        
+        # Reference integrated blackbody flux on the full filter nodes. The
+        # nodes are always reduced from the full filter nodes, even if they
+        # have been reduced before.
+        T = np.logspace(np.log10(Tmin), np.log10(Tmax), Ntemp) # K
+        Ref = {'uJy': self.FullKernel.IntPlanck(T, 'uJy'),
+               'ph': self.FullKernel.IntPlanck(T, 'ph')}
+        
+        # Zero-transmission wings carry no weight, so only the nodes with
+        # positive weight define the integration measure.
+        ww = np.where(self.FullKernel.W_ph > 0.)[0]
+        Wavel = self.FullKernel.Wavel[ww] # m
+        Measure = self.FullKernel.W_ph[ww] # m
+        Center = (Wavel[0]+Wavel[-1])/2. # m
+        Scale = (Wavel[-1]-Wavel[0])/2. # m
+        
+        # Increase the number of Gauss nodes (with respect to the filter's own
+        # transmission-weighted measure) until the integrated flux is
+        # reproduced at all reference temperatures. The transmission is
+        # already contained in the Gauss weights. If the requested accuracy
+        # can't be reached, the full filter nodes without the
+        # zero-transmission wings are used.
+        Nnodes = len(self.FullKernel.Wavel)
+        for n in range(1, min(len(ww), Nmax+1)):
+            x, w = self.getGauss((Wavel-Center)/Scale,
+                                 Measure,
+                                 n)
+            tempKernel = Kernel.Kernel(Center+Scale*x, # m
+                                       np.ones(n),
+                                       self.Width, # m
+                                       self.Mean, # m
+                                       w) # m
+            Err = max([np.max(np.abs(tempKernel.IntPlanck(T, Unit)/Ref[Unit]-1.)) for Unit in Ref.keys()])
+            if (Err <= RelTol):
+                break
+        else:
+            tempKernel = Kernel.Kernel(Wavel, # m
+                                       self.Trans[ww],
+                                       self.Width, # m
+                                       self.Mean, # m
+                                       self.FullKernel.Weights[ww]) # m
+            Err = max([np.max(np.abs(tempKernel.IntPlanck(T, Unit)/Ref[Unit]-1.)) for Unit in Ref.keys()])
+        self.Kernel = tempKernel
+        self.NodeErr = Err
+        
+        # The lookup tables and the star fluxes have been computed on the
+        # previous filter nodes.
+        self.LUT = {}
+        self.StarCache = {}
+        
+        # Print.
+        print('--> Reducing Filter '+self.Name)
+        print('Nodes = %.0f of %.0f, max relative error = %.1e (%.0f-%.0f K)' % (len(self.Kernel.Wavel), Nnodes, self.NodeErr, Tmin, Tmax))
+        
+        pass
+    
+    def getGauss(self,
+                 x,
+                 Measure,
+                 Nnodes):
+        """
+        Parameters
+        ----------
+        x: array
+            Filter nodes scaled to [-1, 1].
+        Measure: array
+            Non-negative weights of filter nodes.
+        Nnodes: int
+            Number of Gauss nodes.
+        
+        Returns
+        -------
+        x: array
+            Gauss nodes scaled to [-1, 1].
+        w: array
+            Gauss weights.
+        """
+        
+        # Lanczos iteration with full reorthogonalization yields the Jacobi
+        # matrix of the orthogonal polynomials of the discrete measure.
+        Q = np.zeros((len(x), Nnodes+1))
+        Q[:, 0] = np.sqrt(Measure/np.sum(Measure))
+        alpha = np.zeros(Nnodes)
+        beta = np.zeros(Nnodes)
+        for k in range(Nnodes):
+            v = x*Q[:, k]
+            alpha[k] = np.dot(Q[:, k], v)
+            for l in range(2):
+                v -= np.dot(Q[:, :k+1], np.dot(Q[:, :k+1].T, v))
+            beta[k] = np.linalg.norm(v)
+            Q[:, k+1] = v/beta[k]
+        
+        # Golub-Welsch: the Gauss nodes are the eigenvalues of the Jacobi
+        # matrix and the weights follow from the first eigenvector components.
+        J = np.diag(alpha)+np.diag(beta[:-1], 1)+np.diag(beta[:-1], -1)
+        x, V = np.linalg.eigh(J)
+        w = np.sum(Measure)*V[0, :]**2
+        
+        return x, w
+    
+    def getStarFlx(self,
+                   Ts, # K
+                   Unit):
+        """
+        Parameters
+        ----------
+        Ts: array
+            Host star effective temperature (K).
+        Unit: 'uJy', 'ph'
+            Unit in which the photometry should be computed.
+        
+        Returns
+        -------
+        IntFlx: array
+            Integrated flux (uJy or ph/s/m^2) of a blackbody with unit solid
+            angle at the host star effective temperature.
+        """
+        
+        # Only integrate the distinct temperatures which haven't been cached
+        # yet. Single and double precision are cached separately.
+        Tu, Inv = np.unique(Ts, return_inverse=True)
+        Keys = [(Tu[k], Unit, Tu.dtype.str) for k in range(len(Tu))]
+        Miss = [k for k in range(len(Keys)) if Keys[k] not in self.StarCache]
+        if (len(Miss) > 0):
+            if (Unit in self.LUT):
+                IntFlx = self.LUT[Unit].Interpolate(Tu[Miss])
+            else:
+                IntFlx = self.Kernel.IntPlanck(Tu[Miss], # K
+                                               Unit)
+            for k in range(len(Miss)):
+                self.StarCache[Keys[Miss[k]]] = IntFlx[k]
+        IntFlx = np.array([self.StarCache[Key] for Key in Keys])[Inv.ravel()]
+        
+        return IntFlx
+    
     def SummaryPlot(self,
                     FigDir=None,
                     block=True):
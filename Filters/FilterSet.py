@@ -0,0 +1,220 @@
+"""
+# =============================================================================
+# P-POP PHOTOMETRY
+# A photometry tool for P-POP
+# =============================================================================
+"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+
+from Filters import Kernel, TopHat
+
+
+# =============================================================================
+# FILTERSET
+# =============================================================================
+
+# A FilterSet can be passed to the ComputeBlock method of the Star and Planet
+# modules instead of a single Filter. The blackbody spectra are then evaluated
+# only once on a master wavelength grid which contains the nodes of all filters
+# and the integrated fluxes are returned for all filters at once with the
+# filters along the first axis.
+
+class FilterSet():
+    
+    def __init__(self,
+                 Filters):
+        """
+        Parameters
+        ----------
+        Filters: list
+            List of instances of class Filter.
+        """
+        
+        self.Filters = Filters
+        self.Nfilters = len(self.Filters)
+        self.Name = '+'.join([self.Filters[i].Name for i in range(self.Nfilters)])
+        
+        # Top-hat filters are integrated analytically all at once.
+        if (np.all([self.Filters[i].Kernel.Analytic for i in range(self.Nfilters)])):
+            self.Kernel = TopHat.AnalyticKernel(np.array([self.Filters[i].WavelMin for i in range(self.Nfilters)]), # m
+                                                np.array([self.Filters[i].WavelMax for i in range(self.Nfilters)]), # m
+                                                np.array([self.Filters[i].Width for i in range(self.Nfilters)]), # m
+                                                np.array([self.Filters[i].Mean for i in range(self.Nfilters)])) # m
+            self.Wavel = self.Kernel.Wavel # m
+        
+        # Merge the (possibly reduced) filter nodes onto one sorted master
+        # wavelength grid. Top-hat filters contribute their quadrature nodes.
+        else:
+            self.Wavel = np.unique(np.concatenate([self.getQuadrature(i).Wavel for i in range(self.Nfilters)])) # m
+            
+            # Integration kernel of all filters on the master wavelength grid.
+            self.Kernel = MasterKernel(self.Wavel, # m
+                                       [self.getQuadrature(i) for i in range(self.Nfilters)])
+        
+        # Lookup tables are only used if they exist for all filters.
+        self.LUT = {}
+        for Unit in self.Filters[0].LUT.keys():
+            if (np.all([Unit in self.Filters[i].LUT for i in range(self.Nfilters)])):
+                self.LUT[Unit] = LUTSet([self.Filters[i].LUT[Unit] for i in range(self.Nfilters)])
+        
+        # Print.
+        print('--> Initializing FilterSet with %.0f filters' % self.Nfilters)
+        print('Master grid nodes = %.0f (%.0f filter nodes in total)' % (len(self.Wavel), np.sum([len(self.getQuadrature(i).Wavel) for i in range(self.Nfilters)])))
+        
+        pass
+    
+    def getQuadrature(self,
+                      i):
+        """
+        Parameters
+        ----------
+        i: int
+            Index of the filter.
+        
+        Returns
+        -------
+        Kernel: instance
+            Quadrature kernel of the filter.
+        """
+        
+        if (self.Filters[i].Kernel.Analytic == True):
+            return self.Filters[i].Quadrature
+        
+        return self.Filters[i].Kernel
+    
+    def getStarFlx(self,
+                   Ts, # K
+                   Unit):
+        """
+        Parameters
+        ----------
+        Ts: array
+            Host star effective temperature (K).
+        Unit: 'uJy', 'ph'
+            Unit in which the photometry should be computed.
+        
+        Returns
+        -------
+        IntFlx: array
+            Integrated flux (uJy or ph/s/m^2) of a blackbody with unit solid
+            angle at the host star effective temperature for each filter.
+        """
+        
+        # The host star fluxes are cached by each filter.
+        IntFlx = np.array([self.Filters[i].getStarFlx(Ts, # K
+                                                      Unit) for i in range(self.Nfilters)])
+        
+        return IntFlx
+
+
+# =============================================================================
+# MASTERKERNEL
+# =============================================================================
+
+class MasterKernel(Kernel.Kernel):
+    
+    def __init__(self,
+                 Wavel, # m
+                 Kernels):
+        """
+        Parameters
+        ----------
+        Wavel: array
+            Wavelength (m) of master grid nodes.
+        Kernels: list
+            List of instances of class Kernel.
+        """
+        
+        # Constants.
+        self.h = 6.62607004e-34 # m^2*kg/s
+        self.c = 299792458. # m/s
+        self.kB = 1.38064852e-23 # m^2*kg/s^2/K
+        
+        self.Analytic = False
+        self.Wavel = Wavel # m
+        
+        # Scatter the weights of each filter onto the master grid. Nodes
+        # outside of a filter get zero weight.
+        self.W_uJy = np.zeros((len(self.Wavel), len(Kernels)))
+        self.W_ph = np.zeros((len(self.Wavel), len(Kernels)))
+        for i in range(len(Kernels)):
+            ww = np.searchsorted(self.Wavel, Kernels[i].Wavel)
+            np.add.at(self.W_uJy[:, i], ww, Kernels[i].W_uJy)
+            np.add.at(self.W_ph[:, i], ww, Kernels[i].W_ph)
+        
+        # Copies of the nodes and the weights in reduced precision.
+        self.Casts = {}
+        
+        pass
+    
+    def Integrate(self,
+                  Flx,
+                  Unit):
+        """
+        Parameters
+        ----------
+        Flx: array
+            Flux (W/m^3 or ph/s/m^3) at the master grid nodes. Can be 2D with
+            the master grid nodes along the last axis.
+        Unit: 'uJy', 'ph'
+            Unit in which the photometry should be computed.
+        
+        Returns
+        -------
+        IntFlx: array
+            Integrated flux (uJy or ph/s/m^2) with the filters along the first
+            axis.
+        """
+        
+        # The weights are used in the precision of the flux.
+        if (Unit == 'uJy'):
+            IntFlx = np.dot(Flx, self.getCast('W_uJy', Flx.dtype)).T # uJy
+        elif (Unit == 'ph'):
+            IntFlx = np.dot(Flx, self.getCast('W_ph', Flx.dtype)).T # ph/s/m^2
+        
+        return IntFlx
+
+
+# =============================================================================
+# LUTSET
+# =============================================================================
+
+class LUTSet():
+    
+    def __init__(self,
+                 LUTs):
+        """
+        Parameters
+        ----------
+        LUTs: list
+            List of instances of class LUT.
+        """
+        
+        self.LUTs = LUTs
+        
+        pass
+    
+    def Interpolate(self,
+                    T): # K
+        """
+        Parameters
+        ----------
+        T: array
+            Blackbody temperature (K).
+        
+        Returns
+        -------
+        IntFlx: array
+            Integrated flux (uJy or ph/s/m^2) of a blackbody with unit solid
+            angle with the filters along the first axis.
+        """
+        
+        IntFlx = np.array([self.LUTs[i].Interpolate(T) for i in range(len(self.LUTs))])
+        
+        return IntFlx
@@ -0,0 +1,208 @@
+"""
+# =============================================================================
+# P-POP PHOTOMETRY
+# A photometry tool for P-POP
+# =============================================================================
+"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+from scipy.integrate import simps
+
+
+# =============================================================================
+# GETBOSE
+# =============================================================================
+
+def getBose(x,
+            xmin=0.):
+    """
+    Parameters
+    ----------
+    x: array
+        Photon energy in units of kB*T, i.e. h*c/(Wavel*kB*T).
+    xmin: float, array
+        Photon energy by which the occupation number is scaled, i.e. the
+        result is multiplied by exp(xmin).
+    
+    Returns
+    -------
+    Bose: array
+        Bose-Einstein occupation number 1/(exp(x)-1), scaled by exp(xmin).
+    
+    The occupation number is evaluated as exp(-x)/(1-exp(-x)), which cannot
+    overflow in single precision, with expm1 for accuracy at small x. If xmin
+    is close to the smallest x, exp(xmin-x) doesn't underflow either.
+    """
+    
+    return np.exp(xmin-x)/(-np.expm1(-x))
+
+
+# =============================================================================
+# KERNEL
+# =============================================================================
+
+class Kernel():
+    
+    def __init__(self,
+                 Wavel, # m
+                 Trans,
+                 Width, # m
+                 Mean, # m
+                 Weights=None): # m
+        """
+        Parameters
+        ----------
+        Wavel: array
+            Wavelength (m) of filter nodes.
+        Trans: array
+            Transmission of filter nodes.
+        Width: float
+            Width (m) of the filter.
+        Mean: float
+            Mean (m) of the filter.
+        Weights: array, None
+            Quadrature weights (m) of filter nodes. If None, Simpson
+            quadrature weights are used.
+        """
+        
+        # Constants.
+        self.h = 6.62607004e-34 # m^2*kg/s
+        self.c = 299792458. # m/s
+        self.kB = 1.38064852e-23 # m^2*kg/s^2/K
+        
+        self.Analytic = False
+        self.Wavel = Wavel # m
+        
+        # Simpson quadrature weights of the filter nodes. Since the Simpson
+        # rule is linear in the integrand, the weights are obtained by
+        # integrating the unit vectors.
+        self.Weights = Weights # m
+        if (self.Weights is None):
+            self.Weights = self.getWeights(Wavel) # m
+        
+        # Fold the transmission and the unit conversion into the weights so
+        # that the integrated flux becomes a single dot product.
+        AbsTrans = 1.
+        self.W_uJy = 1e6*self.Weights*Trans/Width*Mean**2/self.c*1e26
+        self.W_ph = self.Weights*Trans*AbsTrans
+        
+        # Copies of the nodes and the weights in reduced precision.
+        self.Casts = {}
+        
+        pass
+    
+    def getWeights(self,
+                   Wavel, # m
+                   Nchunk=256):
+        """
+        Parameters
+        ----------
+        Wavel: array
+            Wavelength (m) of filter nodes.
+        Nchunk: int
+            Number of unit vectors which are integrated at once.
+        
+        Returns
+        -------
+        Weights: array
+            Simpson quadrature weights (m) of filter nodes.
+        """
+        
+        Nnodes = len(Wavel)
+        Weights = np.zeros(Nnodes) # m
+        for i in range(0, Nnodes, Nchunk):
+            Eye = np.zeros((min(Nchunk, Nnodes-i), Nnodes))
+            Eye[np.arange(Eye.shape[0]), i+np.arange(Eye.shape[0])] = 1.
+            Weights[i:i+Eye.shape[0]] = simps(Eye, Wavel, axis=-1) # m
+        
+        return Weights
+    
+    def getCast(self,
+                Name,
+                Dtype):
+        """
+        Parameters
+        ----------
+        Name: 'Wavel', 'W_uJy', 'W_ph'
+            Name of the array.
+        Dtype: dtype
+            Data type of the array.
+        
+        Returns
+        -------
+        Array: array
+            Array in the requested data type. Copies are only made once.
+        """
+        
+        Array = getattr(self, Name)
+        if (np.dtype(Dtype) == Array.dtype):
+            return Array
+        Key = (Name, np.dtype(Dtype).str)
+        if (Key not in self.Casts):
+            self.Casts[Key] = Array.astype(Dtype)
+        
+        return self.Casts[Key]
+    
+    def Integrate(self,
+                  Flx,
+                  Unit):
+        """
+        Parameters
+        ----------
+        Flx: array
+            Flux (W/m^3 or ph/s/m^3) at the filter nodes. Can be 2D with the
+            filter nodes along the last axis.
+        Unit: 'uJy', 'ph'
+            Unit in which the photometry should be computed.
+        
+        Returns
+        -------
+        IntFlx: float, array
+            Integrated flux (uJy or ph/s/m^2).
+        """
+        
+        # The weights are used in the precision of the flux.
+        if (Unit == 'uJy'):
+            IntFlx = np.dot(Flx, self.getCast('W_uJy', Flx.dtype)) # uJy
+        elif (Unit == 'ph'):
+            IntFlx = np.dot(Flx, self.getCast('W_ph', Flx.dtype)) # ph/s/m^2
+        
+        return IntFlx
+    
+    def IntPlanck(self,
+                  T, # K
+                  Unit):
+        """
+        Parameters
+        ----------
+        T: float, array
+            Blackbody temperature (K).
+        Unit: 'uJy', 'ph'
+            Unit in which the photometry should be computed.
+        
+        Returns
+        -------
+        IntFlx: array
+            Integrated flux (uJy or ph/s/m^2) of a blackbody with unit solid
+            angle.
+        """
+        
+        # Broadcast the temperatures along the first and the filter nodes
+        # along the second axis.
+        Wavel = self.Wavel[np.newaxis, :] # m
+        T = np.atleast_1d(T)[:, np.newaxis] # K
+        Bose = getBose(self.h*self.c/self.kB/(Wavel*T))
+        
+        if (Unit == 'uJy'):
+            Flx = 2.*np.pi*self.h*self.c**2/Wavel**5*Bose # W/m^3
+        elif (Unit == 'ph'):
+            Flx = 2.*np.pi*self.c/Wavel**4*Bose # ph/s/m^3
+        IntFlx = self.Integrate(Flx,
+                                Unit)
+        
+        return IntFlx
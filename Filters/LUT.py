@@ -0,0 +1,190 @@
+"""
+# =============================================================================
+# P-POP PHOTOMETRY
+# A photometry tool for P-POP
+# =============================================================================
+"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import hashlib
+import numpy as np
+import os
+
+
+# =============================================================================
+# LUT
+# =============================================================================
+
+class LUT():
+    
+    def __init__(self,
+                 Filter,
+                 Unit,
+                 RelTol=1e-6,
+                 Tmin=10., # K
+                 Tmax=1e5, # K
+                 LUTdir=None):
+        """
+        Parameters
+        ----------
+        Filter: instance
+            Instance of class Filter.
+        Unit: 'uJy', 'ph'
+            Unit in which the photometry should be computed.
+        RelTol: float
+            Max relative error of the interpolated integrated flux.
+        Tmin: float
+            Min temperature (K) of the table.
+        Tmax: float
+            Max temperature (K) of the table.
+        LUTdir: str, None
+            Directory to which the table is saved. If None, the table is saved
+            to the directory LUTs next to the filter module.
+        """
+        
+        self.Filter = Filter
+        self.Unit = Unit
+        self.RelTol = RelTol
+        self.Tmin = Tmin # K
+        self.Tmax = Tmax # K
+        self.LUTdir = LUTdir
+        if (self.LUTdir is None):
+            self.LUTdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'LUTs')
+        
+        # The table is identified by the integration kernel of the filter, the
+        # unit and the requested accuracy so that a stale table is never used.
+        Hash = hashlib.sha1()
+        Hash.update(np.ascontiguousarray(self.Filter.Kernel.Wavel, dtype=float).tobytes())
+        Hash.update(np.ascontiguousarray(self.Filter.Kernel.W_ph, dtype=float).tobytes())
+        Hash.update(('%s_%.3e_%.3e_%.3e' % (self.Unit, self.RelTol, self.Tmin, self.Tmax)).encode())
+        self.Hash = Hash.hexdigest()
+        self.Path = os.path.join(self.LUTdir, self.Filter.Name.replace('/', '_')+'_'+self.Unit+'.npz')
+        
+        # Load the table or compute it if it doesn't exist yet.
+        if (self.load() == False):
+            self.getTable()
+            self.save()
+        
+        # Print.
+        print('--> Using LUT '+self.Path)
+        print('Nodes = %.0f, T = %.1f-%.1f K, max relative error = %.1e' % (len(self.logT), np.exp(self.logT[0]), np.exp(self.logT[-1]), self.MaxErr))
+        
+        pass
+    
+    def Exact(self,
+              T): # K
+        """
+        Parameters
+        ----------
+        T: float, array
+            Blackbody temperature (K).
+        
+        Returns
+        -------
+        IntFlx: float, array
+            Integrated flux (uJy or ph/s/m^2) of a blackbody with unit solid
+            angle.
+        """
+        
+        IntFlx = self.Filter.Kernel.IntPlanck(T, # K
+                                              self.Unit)
+        
+        return IntFlx
+    
+    def getTable(self,
+                 Nnodes=65):
+        """
+        Parameters
+        ----------
+        Nnodes: int
+            Number of nodes of the initial log-temperature grid.
+        """
+        
+        # Start from a uniform log-temperature grid and restrict it to the
+        # temperatures for which the integrated flux doesn't underflow.
+        logT = np.linspace(np.log(self.Tmin), np.log(self.Tmax), Nnodes)
+        IntFlx = self.Exact(np.exp(logT))
+        ww = np.where(IntFlx > 0.)[0]
+        if (len(ww) < 2):
+            raise ValueError('Filter '+self.Filter.Name+' has no flux between %.1f and %.1f K' % (self.Tmin, self.Tmax))
+        logT = logT[ww]
+        logI = np.log(IntFlx[ww])
+        
+        # Bisect all intervals whose midpoint is not interpolated to within
+        # the requested relative error until all of them are.
+        while True:
+            logTmid = (logT[:-1]+logT[1:])/2.
+            IntFlxMid = self.Exact(np.exp(logTmid))
+            Err = np.abs(np.exp((logI[:-1]+logI[1:])/2.)/IntFlxMid-1.)
+            ww = np.where(Err > self.RelTol)[0]
+            self.MaxErr = np.max(Err)
+            if (len(ww) == 0):
+                break
+            logT = np.insert(logT, ww+1, logTmid[ww])
+            logI = np.insert(logI, ww+1, np.log(IntFlxMid[ww]))
+        self.logT = logT
+        self.logI = logI
+        
+        pass
+    
+    def load(self):
+        """
+        Returns
+        -------
+        Flag: bool
+            True if a matching table was loaded.
+        """
+        
+        if (os.path.exists(self.Path) == False):
+            return False
+        Data = np.load(self.Path)
+        if (str(Data['Hash']) != self.Hash):
+            return False
+        self.logT = Data['logT']
+        self.logI = Data['logI']
+        self.MaxErr = float(Data['MaxErr'])
+        
+        return True
+    
+    def save(self):
+        """
+        """
+        
+        if (os.path.exists(self.LUTdir) == False):
+            os.makedirs(self.LUTdir)
+        np.savez(self.Path,
+                 Hash=self.Hash,
+                 logT=self.logT,
+                 logI=self.logI,
+                 MaxErr=self.MaxErr)
+        
+        pass
+    
+    def Interpolate(self,
+                    T): # K
+        """
+        Parameters
+        ----------
+        T: array
+            Blackbody temperature (K).
+        
+        Returns
+        -------
+        IntFlx: array
+            Integrated flux (uJy or ph/s/m^2) of a blackbody with unit solid
+            angle.
+        """
+        
+        T = np.asarray(T, dtype=float) # K
+        IntFlx = np.exp(np.interp(np.log(T), self.logT, self.logI))
+        
+        # Fall back to the exact integral outside of the table.
+        ww = np.where((T < np.exp(self.logT[0])) | (T > np.exp(self.logT[-1])))[0]
+        if (len(ww) > 0):
+            IntFlx[ww] = self.Exact(T[ww])
+        
+        return IntFlx
@@ -0,0 +1,272 @@
+"""
+# =============================================================================
+# P-POP PHOTOMETRY
+# A photometry tool for P-POP
+# =============================================================================
+"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+
+from Filters import Filter
+
+
+# =============================================================================
+# TOPHAT
+# =============================================================================
+
+class TopHat(Filter.Filter):
+    
+    def __init__(self,
+                 Name,
+                 WavelMin, # m
+                 WavelMax, # m
+                 Nnodes=1001):
+        """
+        Parameters
+        ----------
+        Name: str
+            Name of the filter.
+        WavelMin: float
+            Min wavelength (m) of the filter.
+        WavelMax: float
+            Max wavelength (m) of the filter.
+        Nnodes: int
+            Number of filter nodes used for plotting and for the system by
+            system reference path.
+        """
+        
+        self.WavelMin = WavelMin # m
+        self.WavelMax = WavelMax # m
+        
+        Wavel = np.linspace(self.WavelMin, self.WavelMax, Nnodes) # m
+        Trans = np.ones(Nnodes)
+        super().__init__(Name,
+                         Wavel, # m
+                         Trans,
+                         Mean=(self.WavelMin+self.WavelMax)/2., # m
+                         Width=self.WavelMax-self.WavelMin) # m
+        
+        # Keep the quadrature kernel for filter sets which mix top-hat and
+        # tabulated filters, but integrate analytically otherwise.
+        self.Quadrature = self.Kernel
+        self.Kernel = AnalyticKernel(self.WavelMin, # m
+                                     self.WavelMax, # m
+                                     self.Width, # m
+                                     self.Mean) # m
+        
+        pass
+    
+    def Reduce(self,
+               RelTol=1e-6,
+               Tmin=50., # K
+               Tmax=50000., # K
+               Ntemp=60,
+               Nmax=100):
+        """
+        Parameters
+        ----------
+        RelTol: float
+            Max relative error of the integrated blackbody flux on the reduced
+            filter nodes.
+        Tmin: float
+            Min reference temperature (K).
+        Tmax: float
+            Max reference temperature (K).
+        Ntemp: int
+            Number of reference temperatures.
+        Nmax: int
+            Max number of reduced filter nodes.
+        """
+        
+        # The integrated flux of a top-hat filter is computed analytically, so
+        # there are no filter nodes to be reduced.
+        self.NodeErr = 0.
+        
+        # Print.
+        print('--> Reducing Filter '+self.Name)
+        print('Top-hat filter is integrated analytically')
+        
+        pass
+
+
+# =============================================================================
+# ANALYTICKERNEL
+# =============================================================================
+
+class AnalyticKernel():
+    
+    def __init__(self,
+                 WavelMin, # m
+                 WavelMax, # m
+                 Width, # m
+                 Mean): # m
+        """
+        Parameters
+        ----------
+        WavelMin: float, array
+            Min wavelength (m) of the top-hat filter(s).
+        WavelMax: float, array
+            Max wavelength (m) of the top-hat filter(s).
+        Width: float, array
+            Width (m) of the top-hat filter(s).
+        Mean: float, array
+            Mean (m) of the top-hat filter(s).
+        """
+        
+        # Constants.
+        self.h = 6.62607004e-34 # m^2*kg/s
+        self.c = 299792458. # m/s
+        self.kB = 1.38064852e-23 # m^2*kg/s^2/K
+        
+        self.Analytic = True
+        self.WavelMin = np.atleast_1d(WavelMin) # m
+        self.WavelMax = np.atleast_1d(WavelMax) # m
+        self.Wavel = np.concatenate([self.WavelMin, self.WavelMax]) # m
+        
+        # Unit conversion of the band-averaged flux, as for a tabulated
+        # filter with unit transmission.
+        AbsTrans = 1.
+        self.W_uJy = 1e6/np.atleast_1d(Width)*np.atleast_1d(Mean)**2/self.c*1e26
+        self.W_ph = np.ones_like(self.W_uJy)*AbsTrans
+        
+        # Bernoulli numbers B_0, ..., B_20 for the small argument expansion.
+        self.Bernoulli = np.array([1., -1./2., 1./6., 0., -1./30., 0., 1./42., 0., -1./30., 0., 5./66., 0., -691./2730., 0., 7./6., 0., -3617./510., 0., 43867./798., 0., -174611./330.])
+        
+        pass
+    
+    def IntBose(self,
+                x,
+                m):
+        """
+        Parameters
+        ----------
+        x: array
+            Lower integration limit.
+        m: 2, 3
+            Power of the integrand x^m/(exp(x)-1).
+        
+        Returns
+        -------
+        Tail: array
+            Integral of x^m/(exp(x)-1) from x to infinity.
+        Head: array
+            Integral of x^m/(exp(x)-1) from 0 to x.
+        """
+        
+        # For x >= 1, sum the series of exp(-n*x) times a polynomial in x,
+        # which converges to machine precision within 40 terms.
+        xl = np.maximum(x, 1.)
+        Tail = np.zeros_like(xl)
+        for n in range(1, 41):
+            if (m == 3):
+                Tail += np.exp(-n*xl)*(xl**3/n+3.*xl**2/n**2+6.*xl/n**3+6./n**4)
+            elif (m == 2):
+                Tail += np.exp(-n*xl)*(xl**2/n+2.*xl/n**2+2./n**3)
+        
+        # For x < 1, expand x/(exp(x)-1) in Bernoulli numbers, which converges
+        # to machine precision within 20 terms.
+        xs = np.minimum(x, 1.)
+        Head = np.zeros_like(xs)
+        Fact = 1.
+        for k in range(len(self.Bernoulli)):
+            if (k > 0):
+                Fact *= k
+            if (self.Bernoulli[k] != 0.):
+                Head += self.Bernoulli[k]*xs**(k+m)/(Fact*(k+m))
+        
+        # Complete each series with the full integral over [0, infinity).
+        if (m == 3):
+            Full = np.pi**4/15.
+        elif (m == 2):
+            Full = 2.*1.2020569031595942
+        Tail = np.where(x >= 1., Tail, Full-Head)
+        Head = np.where(x < 1., Head, Full-Tail)
+        
+        return Tail, Head
+    
+    def IntPlanck(self,
+                  T, # K
+                  Unit):
+        """
+        Parameters
+        ----------
+        T: float, array
+            Blackbody temperature (K).
+        Unit: 'uJy', 'ph'
+            Unit in which the photometry should be computed.
+        
+        Returns
+        -------
+        IntFlx: array
+            Integrated flux (uJy or ph/s/m^2) of a blackbody with unit solid
+            angle. If the kernel contains more than one top-hat filter, the
+            filters are along the first axis.
+        """
+        
+        # Broadcast the top-hat filters along the first and the temperatures
+        # along the second axis. The temperatures are used in double
+        # precision because (kB*T)**4 underflows in single precision.
+        T = np.atleast_1d(np.asarray(T, dtype=float))[np.newaxis, :] # K
+        x1 = self.h*self.c/(self.WavelMax[:, np.newaxis]*self.kB*T)
+        x2 = self.h*self.c/(self.WavelMin[:, np.newaxis]*self.kB*T)
+        
+        # Integral of x^m/(exp(x)-1) from x1 to x2. Subtract the tails if both
+        # limits are large and the heads if both limits are small to avoid
+        # cancellation.
+        if (Unit == 'uJy'):
+            m = 3
+        elif (Unit == 'ph'):
+            m = 2
+        Tail1, Head1 = self.IntBose(x1, m)
+        Tail2, Head2 = self.IntBose(x2, m)
+        Int = np.where(x1 >= 1., Tail1-Tail2, np.where(x2 < 1., Head2-Head1, Tail1-Tail2))
+        
+        if (Unit == 'uJy'):
+            IntFlx = self.W_uJy[:, np.newaxis]*2.*np.pi*(self.kB*T)**4/(self.h**3*self.c**2)*Int # uJy
+        elif (Unit == 'ph'):
+            IntFlx = self.W_ph[:, np.newaxis]*2.*np.pi*(self.kB*T)**3/(self.h**3*self.c**2)*Int # ph/s/m^2
+        if (IntFlx.shape[0] == 1):
+            IntFlx = IntFlx[0]
+        
+        return IntFlx
+
+
+# =============================================================================
+# BINS
+# =============================================================================
+
+def getBins(WavelMin, # m
+            WavelMax, # m
+            R):
+    """
+    Parameters
+    ----------
+    WavelMin: float
+        Min wavelength (m) of the spectral bins.
+    WavelMax: float
+        Max wavelength (m) of the spectral bins.
+    R: float
+        Spectral resolution of the spectral bins.
+    
+    Returns
+    -------
+    Filters: list
+        List of instances of class TopHat.
+    """
+    
+    # Logarithmically spaced bin edges with a width of Wavel/R.
+    Nbins = int(np.ceil(np.log(WavelMax/WavelMin)/np.log((2.*R+1.)/(2.*R-1.))))
+    Edges = np.geomspace(WavelMin, WavelMax, Nbins+1) # m
+    
+    Filters = []
+    for i in range(Nbins):
+        Filters += [TopHat('TopHat/Bin%03.0f_%.3f-%.3fum' % (i, Edges[i]*1e6, Edges[i+1]*1e6),
+                           Edges[i], # m
+                           Edges[i+1])] # m
+    
+    return Filters
@@ -28,7 +28,7 @@ warnings.filterwarnings('ignore')
 
 # Import your own filters and photometry tools here.
 import PhotometryComputer
-from Filters import SVO
+from Filters import SVO, TopHat
 from Star import Blackbody
 from Planet import Thermal, Reflected
 
@@ -40,8 +40,10 @@ from Planet import Thermal, Reflected
 # Select the filters and photometry tools which you want to use here.
 
 # Select the name of the planet population table for which the photometry
-# should be computed here.
+# should be computed here. Compressed planet tables (.gz, .bz2, .xz) are
+# decompressed on the fly.
 PathPlanetTable = '../P-pop/TestPlanetPopulation.txt' # str
+#PathPlanetTable = '../P-pop/TestPlanetPopulation.txt.gz' # str
 
 # Select the filters for which the photometry should be computed here. You can
 # simply use the filter names from the Spanish Virtual Observatory
@@ -54,6 +56,12 @@ SVOids = ['JWST/MIRI.F560W',\
 #          'Paranal/SPHERE.IRDIS_B_J',\
 #          'Paranal/SPHERE.IRDIS_B_H'] # used for HabEx/LUVOIR
 
+# Alternatively, select top-hat spectral bins between a min and a max
+# wavelength with a given spectral resolution here. Their integrated blackbody
+# flux is computed analytically.
+Bins = None # use the SVO filters from above
+#Bins = [4e-6, 18.5e-6, 20.] # min wavelength (m), max wavelength (m), spectral resolution
+
 # Select the photometry tools to compute the fluxes from the stars and the
 # planets as well as their unit and the wavelength range in which the mission
 # is operating here.
@@ -63,6 +71,82 @@ Unit = 'uJy' # micro-Jansky
 #Unit = 'ph' # photons per second per square meter
 Mission = 'MIR' # use AgeomMIR for reflected light (used for LIFE)
 #Mission = 'VIS' # use AgeomVIS for reflected light (used for HabEx/LUVOIR)
+# Lists of units and missions are computed in one pass and written to separate
+# tables (e.g. Unit = ['uJy', 'ph'] or Mission = ['MIR', 'VIS']).
+
+# Select the minimum number of planets for which the photometry is computed at
+# once here. Blocks always contain whole systems.
+BlockSize = 10000 # int
+#BlockSize = None # compute the photometry system by system (reference)
+
+# Select the max memory (MB) used by one block of planets here. If not None,
+# the block size is chosen automatically and the planet table is streamed.
+MemoryBudget = None # use BlockSize
+#MemoryBudget = 1000. # float
+
+# Select whether the photometry should be computed in single precision (about
+# 1e-6 relative precision, half the memory) here.
+Float32 = False
+#Float32 = True
+
+# Select the max relative error of the integrated blackbody flux on the reduced
+# filter nodes here. The filter nodes are reduced to a minimal set of Gauss
+# nodes which reproduces the integrated flux between 50 and 50000 K.
+NodeTol = None # use the full filter nodes
+#NodeTol = 1e-6 # float
+
+# Select the max relative error of the temperature-indexed lookup tables for
+# the integrated blackbody flux here. The tables are saved to Filters/LUTs/ and
+# reused by later runs.
+LUTtol = None # do not use lookup tables
+#LUTtol = 1e-6 # float
+
+# Select whether the planet table should be streamed line by line (constant
+# memory) instead of being loaded into memory at once here.
+Stream = False
+#Stream = True
+
+# Select whether the parsed planet table should be cached as binary columns
+# next to the planet table (faster for repeated runs) here.
+Cache = False
+#Cache = True
+
+# Select the universes (Nuniverse) for which the photometry should be computed
+# here. The systems are located with an index which is saved next to the
+# planet table.
+Universes = None # use all universes
+#Universes = range(10) # list
+
+# Select whether the planet table should be read only once for all filters
+# (faster) or once per filter here.
+SinglePass = True
+#SinglePass = False
+
+# Select whether all filters should be merged onto one master wavelength grid
+# so that the blackbody spectra are evaluated only once for all filters here
+# (useful for many overlapping filters).
+MasterGrid = False
+#MasterGrid = True
+
+# Select the format of the output tables here. Binary formats can be
+# memory-mapped by downstream tools.
+Output = 'txt' # text tables
+#Output = 'npy' # one .npy file per module in <table>_<filter>_npy/
+#Output = 'hdf5' # one dataset per module in <table>_<filter>.hdf5 (requires h5py)
+#Output = 'sqlite' # indexed table Photometry in <table>_<filter>.sqlite
+
+# Select whether one wide output table with a column per module, filter, unit
+# and mission (<table>_photometry) should be written instead of one table per
+# filter here. Requires SinglePass.
+Wide = False
+#Wide = True
+
+# Select the min time (s) between two checkpoints of the run here. An
+# interrupted run can then be resumed from the last checkpoint.
+Checkpoint = None # do not write checkpoints
+#Checkpoint = 600. # float
+Resume = False
+#Resume = True
 
 # Select whether you want to display summary plots after loading the filters
 # and models selected above.
@@ -79,9 +163,12 @@ block = False
 # =============================================================================
 
 # Don't modify the following code.
-Filters = []
-for i in range(len(SVOids)):
-    Filters += [SVO.getFilter(SVOids[i], SummaryPlots, FigDir, block)]
+if (Bins is None):
+    Filters = []
+    for i in range(len(SVOids)):
+        Filters += [SVO.getFilter(SVOids[i], SummaryPlots, FigDir, block)]
+else:
+    Filters = TopHat.getBins(Bins[0], Bins[1], Bins[2])
 
 PhotComp = PhotometryComputer.PhotometryComputer(PathPlanetTable,
                                                  Filters,
@@ -91,5 +178,19 @@ PhotComp = PhotometryComputer.PhotometryComputer(PathPlanetTable,
                                                  Mission,
                                                  SummaryPlots,
                                                  FigDir,
-                                                 block)
+                                                 block,
+                                                 BlockSize,
+                                                 LUTtol,
+                                                 SinglePass,
+                                                 MasterGrid,
+                                                 NodeTol,
+                                                 Stream,
+                                                 Cache,
+                                                 Universes,
+                                                 MemoryBudget,
+                                                 Float32,
+                                                 Output,
+                                                 Wide,
+                                                 Checkpoint,
+                                                 Resume)
 PhotComp.Run()
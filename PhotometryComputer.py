@@ -10,9 +10,16 @@
 # IMPORTS
 # =============================================================================
 
+import copy
+import itertools
 import numpy as np
+import os
+import time
 
+from Filters import FilterSet, LUT
+import System
 import SystemReader
+import TableWriter
 
 
 # =============================================================================
@@ -30,40 +37,143 @@ class PhotometryComputer():
                  Mission,
                  SummaryPlots,
                  FigDir,
-                 block):
+                 block,
+                 BlockSize=10000,
+                 LUTtol=None,
+                 SinglePass=True,
+                 MasterGrid=False,
+                 NodeTol=None,
+                 Stream=False,
+                 Cache=False,
+                 Universes=None,
+                 MemoryBudget=None,
+                 Float32=False,
+                 Output='txt',
+                 Wide=False,
+                 Checkpoint=None,
+                 Resume=False):
         """
         Parameters
         ----------
-        PathPlanetTable: str
-            Path of the planet table to be read.
+        PathPlanetTable: str, None
+            Path of the planet table to be read. If None, no planet table is
+            read and the photometry can only be computed with Compute.
         Filters: list
-            List of instances of class Filter.
+            List of instances of class Filter. They are copied and not
+            modified.
         Sstar: list
             List of modules of type Photometry for computing the host star
             signal.
         Splanet: list
             List of modules of type Photometry for computing the planet
             signal.
-        Unit: 'uJy', 'ph'
-            Unit in which the photometry should be computed.
-        Mission: 'MIR', 'VIS'
-            Wavelength range in which the mission is operating.
+        Unit: 'uJy', 'ph', list
+            Unit in which the photometry should be computed. If a list is
+            given, the photometry is computed in all units in one pass.
+        Mission: 'MIR', 'VIS', list
+            Wavelength range in which the mission is operating. If a list is
+            given, the photometry is computed for all missions in one pass.
         SummaryPlots: bool
             If True, makes summary plots after importing a module.
         FigDir: str
             Directory to which summary plots are saved.
         block: bool
             If True, blocks plots when showing.
+        BlockSize: int, None
+            Minimum number of planets which are computed at once. Blocks always
+            contain whole systems. If None, the photometry is computed system
+            by system.
+        LUTtol: float, None
+            Max relative error of the temperature-indexed lookup tables for
+            the integrated blackbody flux. If None, no lookup tables are used.
+            Only used if BlockSize is not None.
+        SinglePass: bool
+            If True, reads the planet table only once and computes the
+            photometry in all filters for each system (or block of systems).
+            If False, reads the planet table once per filter.
+        MasterGrid: bool
+            If True, merges all filters onto one master wavelength grid so that
+            the blackbody spectra are evaluated only once for all filters.
+            Only used if BlockSize is not None and SinglePass is True.
+        NodeTol: float, None
+            Max relative error of the integrated blackbody flux on the reduced
+            filter nodes. If None, the full filter nodes are used. Only used
+            if BlockSize is not None.
+        Stream: bool
+            If True, reads the planet table line by line instead of loading
+            it into memory at once.
+        Cache: bool
+            If True, the parsed planet table is cached as binary columns next
+            to the planet table and memory-mapped by later runs.
+        Universes: list, None
+            Numbers of the universes (Nuniverse) for which the photometry
+            should be computed. If None, all universes are used.
+        MemoryBudget: float, None
+            Max memory (MB) used by one block of planets. If not None, the
+            block size is chosen automatically from the number of filter
+            nodes, the number of photometry modules and the length of the
+            lines of the planet table, overriding BlockSize, and the planet
+            table is streamed (or memory-mapped if it is cached). The cache is
+            written column by column in chunks.
+        Float32: bool
+            If True, the planet table, the filter nodes and weights and the
+            outputs are stored and computed in single precision. The max
+            relative error with respect to double precision is reported for
+            a validation sample (ignoring negligible fluxes) and a ValueError
+            is raised if it exceeds 1e-3.
+        Output: 'txt', 'npy', 'hdf5', 'sqlite'
+            Format of the output tables. 'txt' writes text tables, 'npy' one
+            .npy file per photometry module to a directory, 'hdf5' one
+            dataset per photometry module to an HDF5 file (requires h5py) and
+            'sqlite' an indexed table to an SQLite database which also holds
+            the row in the planet table, Nuniverse and Nstar of each planet.
+            The rows of the binary formats are in the same order as those of
+            the text tables.
+        Wide: bool
+            If True, writes one wide output table with a column per photometry
+            module, filter, unit and mission instead of one table per filter.
+            Only used if SinglePass is True.
+        Checkpoint: float, None
+            Min time (s) between two checkpoints of Run, which record the next
+            row of the planet table for each filter and the size of each
+            output table. If None, no checkpoints are written.
+        Resume: bool
+            If True, Run continues from the last checkpoint (if it matches the
+            planet table and the settings) instead of starting from scratch.
+            Everything written after the checkpoint is truncated.
         """
         
         # Print.
         print('--> Initializing PhotometryComputer')
         
         self.PathPlanetTable = PathPlanetTable
-        self.SysRdr = SystemReader.SystemReader(self.PathPlanetTable)
-        self.SysRdr.Open()
+        self.Float32 = Float32
+        self.Dtype = np.float32 if (self.Float32 == True) else np.float64
         
-        self.Filters = Filters
+        # With a memory budget, the planet table must not be held in memory,
+        # not even while the cache is built. A valid cache is memory-mapped
+        # anyway.
+        self.MemoryBudget = MemoryBudget
+        if (self.MemoryBudget is not None and Stream == False):
+            print('--> Streaming the planet table because of the memory budget')
+            Stream = True
+        if (self.PathPlanetTable is None):
+            self.SysRdr = None
+        else:
+            self.SysRdr = SystemReader.SystemReader(self.PathPlanetTable,
+                                                    Stream,
+                                                    Cache,
+                                                    Dtype=self.Dtype)
+            self.SysRdr.Open()
+        
+        # Work on copies of the filters with their own lookup tables and star
+        # flux caches, so that the filters which are passed in are not
+        # modified and later instances don't depend on earlier ones.
+        self.Filters = []
+        for Filter in Filters:
+            self.Filters += [copy.copy(Filter)]
+            self.Filters[-1].LUT = {}
+            self.Filters[-1].StarCache = {}
         self.Nfilters = len(self.Filters)
         
         self.Sstar = []
@@ -82,147 +192,971 @@ class PhotometryComputer():
                 self.Splanet[-1].SummaryPlots(FigDir=FigDir,
                                               block=block)
         
-        if (Unit == 'uJy'):
-            self.Unit = Unit
-        elif (Unit == 'ph'):
-            self.Unit = Unit
-        else:
-            print('--> WARNING: '+str(Unit)+' is an unknown unit')
-            self.Unit = 'uJy'
-        print('--> Using unit '+str(self.Unit))
-        
-        if (Mission == 'MIR'):
-            self.Mission = Mission
-        elif (Mission == 'VIS'):
-            self.Mission = Mission
+        # Only parse the columns of the planet table which are used by the
+        # photometry modules.
+        self.Columns = []
+        for Module in self.Sstar+self.Splanet:
+            if (hasattr(Module, 'Columns') == False):
+                self.Columns = None
+                break
+            self.Columns += Module.Columns
+        if (self.SysRdr is not None):
+            self.SysRdr.setColumns(self.Columns)
+            
+            # Only read the selected universes.
+            self.SysRdr.setUniverses(Universes)
+            self.Universes = None if (Universes is None) else sorted(set(Universes))
+            
+            # Checkpoints are written next to the planet table.
+            self.PathCheckpoint = self.SysRdr.PathBase+'_checkpoint.npz'
+        
+        # Several units and missions can be computed in one pass.
+        if (isinstance(Unit, str)):
+            Unit = [Unit]
+        self.Units = []
+        for i in range(len(Unit)):
+            if (Unit[i] in self.Units):
+                print('--> WARNING: '+str(Unit[i])+' is given more than once')
+            elif (Unit[i] == 'uJy'):
+                self.Units += [Unit[i]]
+            elif (Unit[i] == 'ph'):
+                self.Units += [Unit[i]]
+            else:
+                print('--> WARNING: '+str(Unit[i])+' is an unknown unit')
+        if (len(self.Units) == 0):
+            self.Units = ['uJy']
+        self.Unit = self.Units[0]
+        print('--> Using unit '+', '.join(self.Units))
+        
+        if (isinstance(Mission, str)):
+            Mission = [Mission]
+        self.Missions = []
+        for i in range(len(Mission)):
+            if (Mission[i] in self.Missions):
+                print('--> WARNING: '+str(Mission[i])+' is given more than once')
+            elif (Mission[i] == 'MIR'):
+                self.Missions += [Mission[i]]
+            elif (Mission[i] == 'VIS'):
+                self.Missions += [Mission[i]]
+            else:
+                print('--> WARNING: '+str(Mission[i])+' is an unknown mission')
+        if (len(self.Missions) == 0):
+            self.Missions = ['MIR']
+        self.Mission = self.Missions[0]
+        print('--> Using mission '+', '.join(self.Missions))
+        
+        # All combinations of units and missions.
+        self.Combos = [(self.Units[i], self.Missions[j]) for i in range(len(self.Units)) for j in range(len(self.Missions))]
+        
+        # Binary output tables can be memory-mapped by downstream tools.
+        self.Output = Output
+        if (self.Output not in ['txt', 'npy', 'hdf5', 'sqlite']):
+            print('--> WARNING: '+str(self.Output)+' is an unknown output format')
+            self.Output = 'txt'
+        if (self.Output == 'hdf5' and TableWriter.h5py is None):
+            print('--> WARNING: h5py is not installed, writing .npy columns instead')
+            self.Output = 'npy'
+        print('--> Using output format '+self.Output)
+        
+        # The block size is only known once the filter nodes are final.
+        self.BlockSize = BlockSize
+        if (self.MemoryBudget is not None):
+            self.BlockSize = 1
+        
+        # The system by system computation always uses the full filter nodes
+        # without lookup tables.
+        self.NodeTol = NodeTol
+        if (self.NodeTol is not None and self.BlockSize is None):
+            print('--> WARNING: NodeTol requires BlockSize')
+            self.NodeTol = None
+        if (self.NodeTol is not None):
+            for i in range(self.Nfilters):
+                self.Filters[i].Reduce(self.NodeTol)
+        
+        self.LUTtol = LUTtol
+        if (self.LUTtol is not None and self.BlockSize is None):
+            print('--> WARNING: LUTtol requires BlockSize')
+            self.LUTtol = None
+        if (self.LUTtol is not None):
+            for i in range(self.Nfilters):
+                for Unit in self.Units:
+                    self.Filters[i].LUT[Unit] = LUT.LUT(self.Filters[i],
+                                                        Unit,
+                                                        self.LUTtol)
+        
+        self.SinglePass = SinglePass
+        
+        self.MasterGrid = MasterGrid
+        if (self.MasterGrid == True):
+            if (self.BlockSize is None or self.SinglePass == False):
+                print('--> WARNING: MasterGrid requires BlockSize and SinglePass')
+                self.MasterGrid = False
+            else:
+                self.FilterSet = FilterSet.FilterSet(self.Filters)
+        
+        self.Wide = Wide
+        if (self.Wide == True and self.SinglePass == False):
+            print('--> WARNING: Wide requires SinglePass')
+            self.Wide = False
+        
+        self.Checkpoint = Checkpoint
+        self.Resume = Resume
+        
+        if (self.MemoryBudget is not None):
+            self.BlockSize = self.getBlockSize(self.MemoryBudget)
+        if (self.BlockSize is None):
+            print('--> Computing photometry system by system')
         else:
-            print('--> WARNING: '+str(Mission)+' is an unknown mission')
-            self.Mission = 'MIR'
-        print('--> Using mission '+str(self.Mission))
+            print('--> Computing photometry in blocks of %.0f planets' % self.BlockSize)
+        
+        # Compare single and double precision on the first planets of the
+        # planet table. Without a planet table, they are compared on the
+        # first planets passed to Compute.
+        self.Float32Err = None
+        if (self.Float32 == True and self.SysRdr is not None):
+            Reader = SystemReader.SystemReader(self.PathPlanetTable,
+                                               True)
+            Reader.Open()
+            Reader.setColumns(self.Columns)
+            Sys = Reader.nextBlock(1000)
+            Reader.Close()
+            print('')
+            if (Sys is not None):
+                self.validateFloat32({Name: getattr(Sys, Name) for Name in System.SystemView.__slots__})
         
         pass
     
+    def validateFloat32(self,
+                        Columns):
+        """
+        Parameters
+        ----------
+        Columns: dict
+            Columns of a validation sample of planets in double precision.
+        
+        Returns
+        -------
+        MaxErr: float
+            Max relative error of the photometry in single precision with
+            respect to double precision.
+        """
+        
+        Fluxes32 = self.Compute(Columns, np.float32)
+        Fluxes64 = self.Compute(Columns, np.float64)
+        
+        # Fluxes which are negligible compared to the brightest planet in the
+        # same module and filter or which can't be represented in single
+        # precision are ignored, e.g. the thermal emission of cool planets in
+        # the visible.
+        MaxErr = 0.
+        for Combo in self.Combos:
+            for k in range(2):
+                F32 = Fluxes32[Combo][k].astype(np.float64)
+                F64 = Fluxes64[Combo][k]
+                Floor = np.maximum(1e-20*np.max(np.abs(F64), axis=-1, keepdims=True, initial=0.), np.finfo(np.float32).tiny)
+                ww = np.abs(F64) > Floor
+                if (np.any(ww)):
+                    MaxErr = max(MaxErr, np.max(np.abs(F32[ww]/F64[ww]-1.)))
+        self.Float32Err = MaxErr
+        
+        # Print.
+        print('--> Float32 max relative error = %.1e (%.0f planets)' % (MaxErr, len(Columns['Nuniverse'])))
+        
+        # Single precision should be accurate to about 1e-5. Much larger
+        # errors mean that the photometry is broken in single precision.
+        if (MaxErr > 1e-3):
+            raise ValueError('Float32 max relative error of %.1e is too large, use double precision' % MaxErr)
+        elif (MaxErr > 1e-5):
+            print('--> WARNING: Float32 max relative error is above 1e-5')
+        
+        return MaxErr
+    
+    def getBlockSize(self,
+                     MemoryBudget):
+        """
+        Parameters
+        ----------
+        MemoryBudget: float
+            Max memory (MB) used by one block of planets.
+        
+        Returns
+        -------
+        BlockSize: int
+            Number of planets per block such that the planet x filter node
+            intermediates, the table columns and (in streaming mode) the
+            lines of one block fit into the memory budget.
+        """
+        
+        # Number of filter nodes at which the spectra are evaluated at once.
+        # Lookup tables and top-hat filters don't need any.
+        if (self.MasterGrid == True):
+            Filters = [self.FilterSet]
+        else:
+            Filters = self.Filters
+        Nnodes = 1
+        for Filter in Filters:
+            if (Filter.Kernel.Analytic == False and np.all([Unit in Filter.LUT for Unit in self.Units]) == False):
+                Nnodes = max(Nnodes, len(Filter.Kernel.Wavel))
+        
+        # Each module holds a few planet x node arrays (exponent, Bose term and
+        # spectrum in each unit) at the same time. In addition, a block holds
+        # its table columns and the integrated fluxes of all filters. In
+        # streaming mode, the lines of a block are held until they have been
+        # parsed, which dominates if there are only a few filter nodes.
+        Nmodules = self.Nsstar+self.Nsplanet
+        Ncolumns = 28 if (self.Columns is None) else len(set(self.Columns+['Nuniverse', 'Nstar']))
+        Bytes = np.dtype(self.Dtype).itemsize*(Nmodules*(2+len(self.Units))*Nnodes+Ncolumns+Nmodules*self.Nfilters*len(self.Combos)) # B
+        if (self.SysRdr is not None):
+            Bytes += self.SysRdr.getLineBytes() # B
+        BlockSize = max(1, int(MemoryBudget*1e6/Bytes))
+        
+        # Print.
+        print('--> Memory budget = %.1f MB, %.0f filter nodes, %.0f modules, %.0f B per planet' % (MemoryBudget, Nnodes, Nmodules, Bytes))
+        
+        return BlockSize
+    
     def Run(self):
         """
         """
         
-        # Go through all filters.
-        for i in range(self.Nfilters):
-            
-            print('--> Filter %.0f of %.0f: ' % (i+1, self.Nfilters)+self.Filters[i].Name)
-            
-            # Reset the table flag and the line counter.
-            self.TableFlag = False
-            self.SysRdr.Reset()
+        if (self.SysRdr is None):
+            raise ValueError('Run requires a planet table, use Compute instead')
+        
+        # Reset the table writers, the fluxes of the wide table, the next row
+        # of the planet table for each filter and the size of each output
+        # table. When resuming, they are taken from the last checkpoint.
+        self.Writers = {}
+        self.Pending = {}
+        self.Rows = np.zeros(self.Nfilters, dtype=int)
+        self.Finished = np.zeros(self.Nfilters, dtype=bool)
+        self.Positions = {}
+        if (self.Resume == True):
+            self.loadCheckpoint()
+        self.Saved = time.time()
+        
+        # Flush and close the photometry tables on completion or error.
+        try:
+            # Read the planet population table only once and compute the
+            # photometry in all filters for each system (or block of systems).
+            if (self.SinglePass == True):
+                
+                print('--> Filters 1-%.0f of %.0f: ' % (self.Nfilters, self.Nfilters)+', '.join([self.Filters[i].Name for i in range(self.Nfilters)]))
+                
+                # Reset the line counter. When resuming, move it to the next
+                # row instead.
+                if (self.Rows[0] > 0):
+                    self.SysRdr.Seek(int(self.Rows[0]))
+                else:
+                    self.SysRdr.Reset()
+                
+                # Get the first system (or block of systems). Then compute the
+                # signal of the host star and the planet until the end of the
+                # planet population table is reached.
+                Sys = self.nextSystem()
+                while (Sys is not None):
+                    
+                    # Compute the photometry in all filters at once on the master
+                    # wavelength grid.
+                    if (self.MasterGrid == True):
+                        Fluxes = self.computeFluxes(self.FilterSet,
+                                                    Sys)
+                        for i in range(self.Nfilters):
+                            for Combo in self.Combos:
+                                self.writeFluxes(i,
+                                                 Combo,
+                                                 Fluxes[Combo][0][:, i],
+                                                 Fluxes[Combo][1][:, i])
+                    
+                    # Compute the photometry filter by filter.
+                    else:
+                        for i in range(self.Nfilters):
+                            Fluxes = self.computeFluxes(self.Filters[i],
+                                                        Sys)
+                            for Combo in self.Combos:
+                                self.writeFluxes(i,
+                                                 Combo,
+                                                 Fluxes[Combo][0],
+                                                 Fluxes[Combo][1])
+                    
+                    # All filters of the wide table are known now.
+                    if (self.Wide == True):
+                        self.writeWide()
+                    
+                    # All filters are done up to the end of the block.
+                    self.Rows[:] = self.SysRdr.Row+len(Sys.Nuniverse)
+                    self.saveCheckpoint()
+                    
+                    # Get the next system (or block of systems).
+                    Sys = self.nextSystem()
+                
+                self.Finished[:] = True
+                print('')
             
-            # Get the first system. Then compute the signal of the host star
-            # and the planet until the end of the planet population table is
-            # reached.
-            Sys = self.SysRdr.nextSystem()
-            while (Sys is not None):
+            # Read the planet population table once per filter.
+            else:
                 
-                # Compute the signal of the host star.
+                # Go through all filters.
+                for i in range(self.Nfilters):
+                    
+                    print('--> Filter %.0f of %.0f: ' % (i+1, self.Nfilters)+self.Filters[i].Name)
+                    
+                    # Skip the filters which are already done.
+                    if (self.Finished[i] == True):
+                        print('--> Already done')
+                        continue
+                    
+                    # Reset the line counter. When resuming, move it to the
+                    # next row instead.
+                    if (self.Rows[i] > 0):
+                        self.SysRdr.Seek(int(self.Rows[i]))
+                    else:
+                        self.SysRdr.Reset()
+                    
+                    # Get the first system (or block of systems). Then compute the
+                    # signal of the host star and the planet until the end of the
+                    # planet population table is reached.
+                    Sys = self.nextSystem()
+                    while (Sys is not None):
+                        
+                        Fluxes = self.computeFluxes(self.Filters[i],
+                                                    Sys)
+                        for Combo in self.Combos:
+                            self.writeFluxes(i,
+                                             Combo,
+                                             Fluxes[Combo][0],
+                                             Fluxes[Combo][1])
+                        
+                        # The filter is done up to the end of the block.
+                        self.Rows[i] = self.SysRdr.Row+len(Sys.Nuniverse)
+                        self.saveCheckpoint()
+                        
+                        # Get the next system (or block of systems).
+                        Sys = self.nextSystem()
+                    
+                    # Close the photometry tables of the filter before it is
+                    # recorded as done, since they are not opened again when
+                    # resuming.
+                    self.closeWriters(i)
+                    self.Finished[i] = True
+                    self.saveCheckpoint(Force=True)
+                    print('')
+        
+        finally:
+            self.closeWriters()
+        
+        # The checkpoint is not needed anymore once the run is complete.
+        if (os.path.exists(self.PathCheckpoint) == True):
+            os.remove(self.PathCheckpoint)
+        
+        pass
+    
+    def Compute(self,
+                Systems,
+                Dtype=None):
+        """
+        Parameters
+        ----------
+        Systems: dict, list
+            Columns of a planet population (dict of arrays with the same names
+            as the attributes of class System, at least Nuniverse, Nstar and
+            the columns used by the photometry modules) or iterable of
+            instances of class System. If BlockSize is None, each System must
+            contain exactly one system.
+        Dtype: dtype, None
+            Data type of the float columns and the outputs. If None, single
+            precision is used if Float32 is True and double precision
+            otherwise.
+        
+        Returns
+        -------
+        Fluxes: dict
+            Signal of the host star (Fstar) and the planet (Fplanet) for each
+            (unit, mission) combination. Fstar and Fplanet are arrays with the
+            star or planet modules along the first, the filters along the
+            second and the planets along the third axis.
+        
+        Computes the photometry in memory, without reading or writing any
+        tables. If Float32 is True, single and double precision are compared
+        on the first planets when Compute is called for the first time, as in
+        Run.
+        """
+        
+        if (Dtype is None):
+            Dtype = self.Dtype
+            if (self.Float32 == True and self.Float32Err is None):
+                Sample, Systems = self.getSample(Systems)
+                if (Sample is not None):
+                    self.validateFloat32(Sample)
+        
+        # Split the columns into whole systems (or blocks of systems).
+        if (isinstance(Systems, dict)):
+            Systems = self.iterSystems(Systems,
+                                       Dtype)
+        
+        Fstar = {Combo: [] for Combo in self.Combos}
+        Fplanet = {Combo: [] for Combo in self.Combos}
+        for Sys in Systems:
+            
+            # Compute the photometry in all filters at once on the master
+            # wavelength grid or filter by filter.
+            if (self.MasterGrid == True):
+                Fluxes = self.computeFluxes(self.FilterSet,
+                                            Sys)
+            else:
+                Fluxes = [self.computeFluxes(self.Filters[i],
+                                             Sys) for i in range(self.Nfilters)]
+                Fluxes = {Combo: (np.stack([Fluxes[i][Combo][0] for i in range(self.Nfilters)], axis=1),
+                                  np.stack([Fluxes[i][Combo][1] for i in range(self.Nfilters)], axis=1)) for Combo in self.Combos}
+            for Combo in self.Combos:
+                Fstar[Combo] += [Fluxes[Combo][0].reshape(self.Nsstar, self.Nfilters, -1)]
+                Fplanet[Combo] += [Fluxes[Combo][1].reshape(self.Nsplanet, self.Nfilters, -1)]
+        
+        Fluxes = {}
+        for Combo in self.Combos:
+            if (len(Fstar[Combo]) == 0):
+                Fluxes[Combo] = (np.zeros((self.Nsstar, self.Nfilters, 0), dtype=Dtype), np.zeros((self.Nsplanet, self.Nfilters, 0), dtype=Dtype))
+            else:
+                Fluxes[Combo] = (np.concatenate(Fstar[Combo], axis=2).astype(Dtype, copy=False), np.concatenate(Fplanet[Combo], axis=2).astype(Dtype, copy=False))
+        
+        return Fluxes
+    
+    def getSample(self,
+                  Systems,
+                  Nplanets=1000):
+        """
+        Parameters
+        ----------
+        Systems: dict, list
+            Columns of a planet population or iterable of instances of class
+            System, see Compute.
+        Nplanets: int
+            Minimum number of planets in the sample.
+        
+        Returns
+        -------
+        Sample: dict, None
+            Columns of the whole systems containing the first Nplanets
+            planets (or of the first System) or None if there are no planets.
+        Systems: dict, list
+            Systems, which are restored if an iterator has been consumed.
+        """
+        
+        # Take whole systems from the columns.
+        if (isinstance(Systems, dict)):
+            if (len(Systems['Nuniverse']) == 0):
+                return None, Systems
+            Offsets = SystemReader.getBoundaries(np.asarray(Systems['Nuniverse']), np.asarray(Systems['Nstar']))
+            End = Offsets[min(np.searchsorted(Offsets, Nplanets), len(Offsets)-1)]
+            Sample = {}
+            for Name in System.SystemView.__slots__:
+                if (Name in Systems and Systems[Name] is not None):
+                    Sample[Name] = np.asarray(Systems[Name])[:End]
+            return Sample, Systems
+        
+        # Take the first System and put it back in front of the others.
+        Systems = iter(Systems)
+        Sys = next(Systems, None)
+        if (Sys is None):
+            return None, []
+        Sample = {Name: getattr(Sys, Name, None) for Name in System.SystemView.__slots__}
+        
+        return Sample, itertools.chain([Sys], Systems)
+    
+    def iterSystems(self,
+                    Columns,
+                    Dtype):
+        """
+        Parameters
+        ----------
+        Columns: dict
+            Columns of a planet population.
+        Dtype: dtype
+            Data type of the float columns.
+        
+        Returns
+        -------
+        Systems: generator
+            Instances of class SystemView containing the next system (or the
+            next block of systems if BlockSize is not None).
+        """
+        
+        Data = {}
+        for Name in System.SystemView.__slots__:
+            Data[Name] = np.asarray(Columns[Name]) if (Name in Columns and Columns[Name] is not None) else None
+            if (Data[Name] is not None and Data[Name].dtype.kind == 'f'):
+                Data[Name] = Data[Name].astype(Dtype, copy=False)
+        Offsets = SystemReader.getBoundaries(Data['Nuniverse'], Data['Nstar'])
+        
+        Start = 0
+        while (Start < Offsets[-1]):
+            if (self.BlockSize is None):
+                End = Offsets[np.searchsorted(Offsets, Start, side='right')]
+            else:
+                End = Offsets[min(np.searchsorted(Offsets, Start+self.BlockSize), len(Offsets)-1)]
+            yield System.SystemView(Data, Start, End)
+            Start = End
+    
+    def computeFluxes(self,
+                      Filter,
+                      Sys):
+        """
+        Parameters
+        ----------
+        Filter: instance
+            Instance of class Filter or FilterSet.
+        Sys: instance
+            Instance of class System.
+        
+        Returns
+        -------
+        Fluxes: dict
+            Signal of the host star (Fstar) and the planet (Fplanet) for each
+            (unit, mission) combination. Fstar and Fplanet are arrays with the
+            star or planet modules (and the filters if a FilterSet is used)
+            along the first axes and the planets along the last axis.
+        """
+        
+        # Compute the signal of the host star and the planet system by system
+        # and separately for each combination of unit and mission.
+        if (self.BlockSize is None):
+            Fluxes = {}
+            for Combo in self.Combos:
                 Fstar = []
                 for j in range(self.Nsstar):
-                    Fstar += [self.Sstar[j].Compute(self.Filters[i],
+                    Fstar += [self.Sstar[j].Compute(Filter,
                                                     Sys,
-                                                    self.Unit,
-                                                    self.Mission)]
-                Fstar = np.array(Fstar)
-                
-                # Compute the signal of the planet.
+                                                    Combo[0],
+                                                    Combo[1])]
                 Fplanet = []
                 for j in range(self.Nsplanet):
-                    Fplanet += [self.Splanet[j].Compute(self.Filters[i],
+                    Fplanet += [self.Splanet[j].Compute(Filter,
                                                         Sys,
-                                                        self.Unit,
-                                                        self.Mission)]
-                Fplanet = np.array(Fplanet)
-                
-                # Create a new photometry table (if it hasn't already been
-                # created) and write the computed fluxes to it.
-                if (self.TableFlag == False):
-                    temp = self.Filters[i].Name.rfind('/')+1
-                    Name = self.PathPlanetTable[:-4]+'_'+self.Filters[i].Name[temp:]
-                    self.write(Name,
-                               Fstar,
-                               Fplanet)
-                    self.TableFlag = True
-                else:
-                    self.append(Name,
-                                Fstar,
-                                Fplanet)
-                
-                # Get the next system.
-                Sys = self.SysRdr.nextSystem()
-            
-            print('')
+                                                        Combo[0],
+                                                        Combo[1])]
+                Fluxes[Combo] = (np.array(Fstar), np.array(Fplanet))
         
-        pass
+        # Compute the signal of the host star and the planet for all
+        # combinations of unit and mission at once so that the modules can
+        # share the blackbody evaluations between them.
+        else:
+            Fstar = []
+            for j in range(self.Nsstar):
+                Fstar += [self.Sstar[j].ComputeSweep(Filter,
+                                                     Sys,
+                                                     self.Units,
+                                                     self.Missions)]
+            Fplanet = []
+            for j in range(self.Nsplanet):
+                Fplanet += [self.Splanet[j].ComputeSweep(Filter,
+                                                         Sys,
+                                                         self.Units,
+                                                         self.Missions)]
+            Fluxes = {}
+            for Combo in self.Combos:
+                Fluxes[Combo] = (np.array([Fstar[j][Combo] for j in range(self.Nsstar)]),
+                                 np.array([Fplanet[j][Combo] for j in range(self.Nsplanet)]))
+        
+        return Fluxes
     
-    def write(self,
-              Name,
-              Fstar,
-              Fplanet):
+    def getName(self,
+                i,
+                Combo):
         """
         Parameters
         ----------
+        i: int
+            Index of the filter.
+        Combo: tuple
+            Combination of unit and mission.
+        
+        Returns
+        -------
         Name: str
-            Name of the output planet table.
+            Name of the output planet table. The unit and the mission are only
+            appended if more than one of them is computed.
         """
         
-        Table = open(Name+'.txt', 'w')
+        temp = self.Filters[i].Name.rfind('/')+1
+        Name = self.SysRdr.PathBase+'_'+self.Filters[i].Name[temp:]
+        if (len(self.Units) > 1):
+            Name += '_'+Combo[0]
+        if (len(self.Missions) > 1):
+            Name += '_'+Combo[1]
         
-        Header = ''
-        for i in range(self.Nsstar):
-            name = str(self.Sstar[i])
-            temp = name.rfind('Photometry')-1
-            Header += name[1:temp]+'\t'
-        for i in range(self.Nsplanet):
-            name = str(self.Splanet[i])
-            temp = name.rfind('Photometry')-1
-            Header += name[1:temp]+'\t'
-        Header += '\n'
+        return Name
+    
+    def writeFluxes(self,
+                    i,
+                    Combo,
+                    Fstar,
+                    Fplanet):
+        """
+        Parameters
+        ----------
+        i: int
+            Index of the filter.
+        Combo: tuple
+            Combination of unit and mission.
+        Fstar: array
+            Signal of the host star for each star module and planet.
+        Fplanet: array
+            Signal of the planet for each planet module and planet.
+        """
         
-        # Old header.
-        Table.write('Ftherm_star\tFtherm_planet\tFrefl_planet\t\n')
+        # Create a new photometry table (if it hasn't already been created)
+        # and buffer the computed fluxes for it.
+        Fstar = Fstar.astype(self.Dtype, copy=False)
+        Fplanet = Fplanet.astype(self.Dtype, copy=False)
         
-        # New header.
-        Table.write(Header)
+        # The columns of the wide table are written once all filters have
+        # been computed.
+        if (self.Wide == True):
+            self.Pending[(i, Combo)] = np.concatenate((Fstar, Fplanet))
+            return
         
-        Table.close()
+        if ((i, Combo) not in self.Writers):
+            Name = self.getName(i,
+                                Combo)
+            self.Writers[(i, Combo)] = self.openWriter(Name,
+                                                       self.getModuleNames(),
+                                                       self.getHeader(),
+                                                       self.Positions.get((i, Combo)))
+        self.writeColumns((i, Combo),
+                          np.concatenate((Fstar, Fplanet)))
         
-        self.append(Name,
-                    Fstar,
-                    Fplanet)
+        pass
+    
+    def writeWide(self):
+        """
+        """
+        
+        # Create the wide table (if it hasn't already been created) and write
+        # the columns of all filters, units and missions of the current block
+        # of systems to it.
+        if ('Wide' not in self.Writers):
+            Names = self.getWideNames()
+            self.Writers['Wide'] = self.openWriter(self.SysRdr.PathBase+'_photometry',
+                                                   Names,
+                                                   [''.join([Name+'\t' for Name in Names])+'\n'],
+                                                   self.Positions.get('Wide'))
+        self.writeColumns('Wide',
+                          np.concatenate([self.Pending[(i, Combo)] for i in range(self.Nfilters) for Combo in self.Combos]))
+        self.Pending = {}
         
         pass
     
-    def append(self,
-               Name,
-               Fstar,
-               Fplanet):
+    def writeColumns(self,
+                     Key,
+                     Columns):
+        """
+        Parameters
+        ----------
+        Key: tuple, str
+            Key of the table writer.
+        Columns: array
+            Columns of the output table along the first and planets along the
+            second axis.
+        """
+        
+        # The SQLite database also holds the identifiers of the planets.
+        if (self.Output == 'sqlite'):
+            self.Writers[Key].Write(Columns,
+                                    self.Ids)
+        else:
+            self.Writers[Key].Write(Columns)
+        
+        pass
+    
+    def nextSystem(self):
+        """
+        Returns
+        -------
+        Sys: instance, None
+            Instance of class System containing the next system (or the next
+            block of systems if BlockSize is not None).
+        """
+        
+        if (self.BlockSize is None):
+            Sys = self.SysRdr.nextSystem()
+        else:
+            Sys = self.SysRdr.nextBlock(self.BlockSize)
+        
+        # Remember the row in the planet table, Nuniverse and Nstar of the
+        # planets for the SQLite database.
+        if (Sys is not None and self.Output == 'sqlite'):
+            self.Ids = (self.SysRdr.Row+np.arange(len(Sys.Nuniverse)),
+                        Sys.Nuniverse,
+                        Sys.Nstar)
+        
+        return Sys
+    
+    def getModuleNames(self):
+        """
+        Returns
+        -------
+        Names: list
+            List of str containing the names of the star and planet modules,
+            i.e. the columns of the output planet table.
+        """
+        
+        Names = []
+        for Module in self.Sstar+self.Splanet:
+            name = str(Module)
+            temp = name.rfind('Photometry')-1
+            Names += [name[1:temp]]
+        
+        return Names
+    
+    def getHeader(self):
+        """
+        Returns
+        -------
+        Header: list
+            List of str containing the header lines of the output planet
+            table.
+        """
+        
+        # Old header and new header.
+        Header = ['Ftherm_star\tFtherm_planet\tFrefl_planet\t\n',
+                  ''.join([Name+'\t' for Name in self.getModuleNames()])+'\n']
+        
+        return Header
+    
+    def getWideNames(self):
+        """
+        Returns
+        -------
+        Names: list
+            List of str containing the names of the columns of the wide output
+            planet table, i.e. the module, the filter and the unit and the
+            mission if more than one of them is computed.
+        """
+        
+        Names = []
+        for i in range(self.Nfilters):
+            temp = self.Filters[i].Name.rfind('/')+1
+            for Combo in self.Combos:
+                for name in self.getModuleNames():
+                    Name = name+'_'+self.Filters[i].Name[temp:]
+                    if (len(self.Units) > 1):
+                        Name += '_'+Combo[0]
+                    if (len(self.Missions) > 1):
+                        Name += '_'+Combo[1]
+                    Names += [Name]
+        
+        return Names
+    
+    def openWriter(self,
+                   Name,
+                   Names,
+                   Header,
+                   Position=None):
         """
         Parameters
         ----------
         Name: str
             Name of the output planet table.
+        Names: list
+            List of str containing the names of the columns.
+        Header: list
+            List of str containing the header lines of the text table.
+        Position: int, None
+            Position of an existing output planet table from the last
+            checkpoint at which writing should continue. If None, a new
+            output planet table is created.
         
+        Returns
+        -------
+        Writer: instance
+            Instance of class TableWriter, NpyWriter, HDF5Writer or
+            SQLiteWriter.
         """
         
-        Table = open(Name+'.txt', 'a')
+        if (self.Output == 'npy'):
+            Writer = TableWriter.NpyWriter(Name+'_npy',
+                                           Names,
+                                           self.Dtype,
+                                           Position=Position)
+        elif (self.Output == 'hdf5'):
+            Writer = TableWriter.HDF5Writer(Name+'.hdf5',
+                                            Names,
+                                            self.Dtype,
+                                            Position=Position)
+        elif (self.Output == 'sqlite'):
+            Writer = TableWriter.SQLiteWriter(Name+'.sqlite',
+                                              Names,
+                                              Position=Position)
+        else:
+            Writer = TableWriter.TableWriter(Name+'.txt',
+                                             Header,
+                                             Position=Position)
         
-        # Write the computed fluxes to the photometry table.
-        for i in range(Fstar.shape[1]):
-            temp = ''
-            for j in range(Fstar.shape[0]):
-                temp += '%018.12f\t' % Fstar[j, i]
-            for j in range(Fplanet.shape[0]):
-                temp += '%018.12f\t' % Fplanet[j, i]
-            temp += '\n'
-            
-            Table.write(temp)
+        return Writer
+    
+    def closeWriters(self,
+                     i=None):
+        """
+        Parameters
+        ----------
+        i: int, None
+            Index of the filter whose photometry tables should be closed. If
+            None, all photometry tables are closed.
+        """
+        
+        # Flush the remaining rows and close the photometry tables.
+        for Key in list(self.Writers.keys()):
+            if (i is None or (Key != 'Wide' and Key[0] == i)):
+                self.Writers.pop(Key).Close()
+        
+        pass
+    
+    def getSettings(self):
+        """
+        Returns
+        -------
+        Settings: str
+            Settings which determine the content of the output planet tables.
+        """
+        
+        Settings = repr([[Filter.Name for Filter in self.Filters],
+                         self.Combos,
+                         self.getModuleNames(),
+                         self.Output,
+                         self.Wide,
+                         self.SinglePass,
+                         self.Float32,
+                         self.Universes])
         
-        Table.close()
+        return Settings
+    
+    def saveCheckpoint(self,
+                       Force=False):
+        """
+        Parameters
+        ----------
+        Force: bool
+            If True, the checkpoint is written even if the min time since the
+            last checkpoint has not passed yet.
+        """
+        
+        if (self.Checkpoint is None):
+            return
+        if (Force == False and time.time()-self.Saved < self.Checkpoint):
+            return
+        
+        # Flush all output tables and record their size. The wide table has
+        # the filter -1.
+        Filter = []
+        Unit = []
+        Mission = []
+        Position = []
+        for Key in self.Writers.keys():
+            if (Key == 'Wide'):
+                Filter += [-1]
+                Unit += ['']
+                Mission += ['']
+            else:
+                Filter += [Key[0]]
+                Unit += [Key[1][0]]
+                Mission += [Key[1][1]]
+            Position += [self.Writers[Key].Tell()]
+        
+        # Write the checkpoint to a temporary file first so that an
+        # interruption never leaves a broken checkpoint behind.
+        Key = self.SysRdr.getKey(Hash=False)
+        PathTemp = self.PathCheckpoint[:-4]+'_temp.npz'
+        np.savez(PathTemp,
+                 Size=Key['Size'],
+                 Mtime=Key['Mtime'],
+                 Hash='',
+                 Settings=self.getSettings(),
+                 Rows=self.Rows,
+                 Finished=self.Finished,
+                 Filter=np.array(Filter, dtype=int),
+                 Unit=np.array(Unit, dtype=str),
+                 Mission=np.array(Mission, dtype=str),
+                 Position=np.array(Position, dtype=int))
+        os.replace(PathTemp, self.PathCheckpoint)
+        self.Saved = time.time()
+        
+        pass
+    
+    def loadCheckpoint(self):
+        """
+        """
+        
+        if (os.path.exists(self.PathCheckpoint) == False):
+            print('--> WARNING: No checkpoint found, starting from scratch')
+            return
+        Data = np.load(self.PathCheckpoint)
+        if (self.SysRdr.checkKey(Data) == False or str(Data['Settings']) != self.getSettings()):
+            print('--> WARNING: The checkpoint does not match the planet table or the settings, starting from scratch')
+            return
+        
+        self.Rows = Data['Rows']
+        self.Finished = Data['Finished']
+        for k in range(len(Data['Filter'])):
+            if (Data['Filter'][k] == -1):
+                Key = 'Wide'
+            else:
+                Key = (int(Data['Filter'][k]), (str(Data['Unit'][k]), str(Data['Mission'][k])))
+            self.Positions[Key] = int(Data['Position'][k])
+        print('--> Resuming from checkpoint '+self.PathCheckpoint)
         
         pass
+
+
+# =============================================================================
+# COMPUTEPHOTOMETRY
+# =============================================================================
+
+def computePhotometry(Systems,
+                      Filters,
+                      Sstar,
+                      Splanet,
+                      Unit='uJy',
+                      Mission='MIR',
+                      **kwargs):
+    """
+    Parameters
+    ----------
+    Systems: dict, list
+        Columns of a planet population (dict of arrays) or iterable of
+        instances of class System, see PhotometryComputer.Compute.
+    Filters: list
+        List of instances of class Filter. They are not modified, so that
+        calls with different settings on the same filters are independent.
+    Sstar: list
+        List of modules of type Photometry for computing the host star signal.
+    Splanet: list
+        List of modules of type Photometry for computing the planet signal.
+    Unit: 'uJy', 'ph', list
+        Unit(s) in which the photometry should be computed.
+    Mission: 'MIR', 'VIS', list
+        Wavelength range(s) in which the mission is operating.
+    kwargs:
+        Further keyword arguments of class PhotometryComputer (e.g.
+        BlockSize, LUTtol, MasterGrid, NodeTol).
+    
+    Returns
+    -------
+    Fluxes: dict
+        Signal of the host star (Fstar) and the planet (Fplanet) for each
+        (unit, mission) combination, see PhotometryComputer.Compute.
+    
+    Computes the photometry of a planet population in memory, without reading
+    or writing any tables.
+    """
+    
+    PhotComp = PhotometryComputer(None,
+                                  Filters,
+                                  Sstar,
+                                  Splanet,
+                                  Unit,
+                                  Mission,
+                                  False,
+                                  None,
+                                  False,
+                                  **kwargs)
+    
+    return PhotComp.Compute(Systems)
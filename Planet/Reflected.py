@@ -37,6 +37,9 @@ class Photometry():
         self.pc = 3.0856776e16 # m
         self.au = 149597870700. # m
         
+        # Columns of the planet table which are used by this module.
+        self.Columns = ['AgeomVIS', 'AgeomMIR', 'fp', 'Rp', 'rp', 'Ts', 'Rs', 'Ds']
+        
         pass
     
     def Compute(self,
@@ -121,6 +124,79 @@ class Photometry():
         
         return IntFlx
     
+    def ComputeBlock(self,
+                     Filter,
+                     Sys,
+                     Unit,
+                     Mission):
+        """
+        Parameters
+        ----------
+        Filter: instance
+            Instance of class Filter.
+        Sys: instance
+            Instance of class System containing a block of whole systems.
+        Unit: 'uJy', 'ph'
+            Unit in which the photometry should be computed.
+        Mission: 'MIR', 'VIS'
+            Wavelength range in which the mission is operating.
+        
+        Returns
+        -------
+        IntFlx: array
+            Integrated flux of each planet in the block.
+        """
+        
+        IntFlx = self.ComputeSweep(Filter,
+                                   Sys,
+                                   [Unit],
+                                   [Mission])[(Unit, Mission)]
+        
+        return IntFlx
+    
+    def ComputeSweep(self,
+                     Filter,
+                     Sys,
+                     Units,
+                     Missions):
+        """
+        Parameters
+        ----------
+        Filter: instance
+            Instance of class Filter.
+        Sys: instance
+            Instance of class System containing a block of whole systems.
+        Units: list
+            List of units ('uJy', 'ph') in which the photometry should be
+            computed.
+        Missions: list
+            List of wavelength ranges ('MIR', 'VIS') in which the mission is
+            operating.
+        
+        Returns
+        -------
+        IntFlx: dict
+            Integrated flux of each planet in the block for each (unit,
+            mission) combination.
+        """
+        
+        # The reflected spectrum is the host star spectrum scaled by
+        # wavelength independent geometric factors, so the integrated host
+        # star flux shared via the filter only needs to be scaled. Only the
+        # geometric albedo depends on the mission.
+        Scale = Sys.fp*((Sys.Rp*self.Rearth)/(Sys.Ds*self.pc))**2*((Sys.Rs*self.Rsun)/(Sys.rp*self.au))**2
+        IntFlx = {}
+        for Unit in Units:
+            StarFlx = Filter.getStarFlx(Sys.Ts, # K
+                                        Unit)*Scale
+            for Mission in Missions:
+                if (Mission == 'MIR'):
+                    IntFlx[(Unit, Mission)] = Sys.AgeomMIR*StarFlx
+                elif (Mission == 'VIS'):
+                    IntFlx[(Unit, Mission)] = Sys.AgeomVIS*StarFlx
+        
+        return IntFlx
+    
     def Flx_SI(self,
                Wavel, # m
                Ageom,
@@ -14,6 +14,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 from scipy.integrate import simps
 
+from Filters import Kernel
+
 
 # =============================================================================
 # THERMAL
@@ -35,6 +37,9 @@ class Photometry():
         self.Rearth = 6371000. # m
         self.pc = 3.0856776e16 # m
         
+        # Columns of the planet table which are used by this module.
+        self.Columns = ['Tp', 'Rp', 'Ds']
+        
         pass
     
     def Compute(self,
@@ -81,6 +86,106 @@ class Photometry():
         
         return IntFlx
     
+    def ComputeBlock(self,
+                     Filter,
+                     Sys,
+                     Unit,
+                     Mission):
+        """
+        Parameters
+        ----------
+        Filter: instance
+            Instance of class Filter.
+        Sys: instance
+            Instance of class System containing a block of whole systems.
+        Unit: 'uJy', 'ph'
+            Unit in which the photometry should be computed.
+        Mission: 'MIR', 'VIS'
+            Wavelength range in which the mission is operating.
+        
+        Returns
+        -------
+        IntFlx: array
+            Integrated flux of each planet in the block.
+        """
+        
+        IntFlx = self.ComputeSweep(Filter,
+                                   Sys,
+                                   [Unit],
+                                   [Mission])[(Unit, Mission)]
+        
+        return IntFlx
+    
+    def ComputeSweep(self,
+                     Filter,
+                     Sys,
+                     Units,
+                     Missions):
+        """
+        Parameters
+        ----------
+        Filter: instance
+            Instance of class Filter.
+        Sys: instance
+            Instance of class System containing a block of whole systems.
+        Units: list
+            List of units ('uJy', 'ph') in which the photometry should be
+            computed.
+        Missions: list
+            List of wavelength ranges ('MIR', 'VIS') in which the mission is
+            operating.
+        
+        Returns
+        -------
+        IntFlx: dict
+            Integrated flux of each planet in the block for each (unit,
+            mission) combination.
+        """
+        
+        # The thermal emission doesn't depend on the mission.
+        IntFlx = {}
+        SolidAngle = ((Sys.Rp*self.Rearth)/(Sys.Ds*self.pc))**2
+        for Unit in Units:
+            
+            # If a lookup table exists, only the solid angle needs to be
+            # applied to the tabulated integrated flux.
+            if (Unit in Filter.LUT):
+                IntFlx[Unit] = Filter.LUT[Unit].Interpolate(Sys.Tp)*SolidAngle
+            
+            # Top-hat filters are integrated analytically, so again only the
+            # solid angle needs to be applied.
+            elif (Filter.Kernel.Analytic == True):
+                IntFlx[Unit] = Filter.Kernel.IntPlanck(Sys.Tp, # K
+                                                       Unit)*SolidAngle
+        
+        # Broadcast the planets along the first and the filter nodes along the
+        # second axis. The exponential term is shared by all units. The
+        # filter nodes are used in the precision of the planet table.
+        if (len(IntFlx) < len(Units)):
+            Wavel = Filter.Kernel.getCast('Wavel', Sys.Tp.dtype)[np.newaxis, :] # m
+            Tp = Sys.Tp[:, np.newaxis] # K
+            
+            # The exponential term is scaled by its value at the longest
+            # wavelength, since it underflows in single precision for cool
+            # planets in the visible. The scale factor is applied in double
+            # precision after the integration.
+            xmin = self.h*self.c/self.kB/(np.max(Wavel)*Tp)
+            Bose = Kernel.getBose(self.h*self.c/self.kB/(Wavel*Tp), xmin)*SolidAngle[:, np.newaxis]
+            Scale = np.exp(-xmin[:, 0].astype(np.float64))
+            for Unit in Units:
+                if (Unit == 'uJy' and Unit not in IntFlx):
+                    Flx = 2.*np.pi*self.h*self.c**2/Wavel**5*Bose # W/m^3
+                    IntFlx[Unit] = (Filter.Kernel.Integrate(Flx, # W/m^3
+                                                            Unit)*Scale).astype(Sys.Tp.dtype)
+                elif (Unit == 'ph' and Unit not in IntFlx):
+                    Flx = 2.*np.pi*self.c/Wavel**4*Bose # ph/s/m^3
+                    IntFlx[Unit] = (Filter.Kernel.Integrate(Flx, # ph/s/m^3
+                                                            Unit)*Scale).astype(Sys.Tp.dtype)
+        
+        IntFlx = {(Unit, Mission): IntFlx[Unit] for Unit in Units for Mission in Missions}
+        
+        return IntFlx
+    
     def Flx_SI(self,
                Wavel, # m
                Tp, # K
@@ -35,6 +35,9 @@ class Photometry():
         self.Rsun = 695700000. # m
         self.pc = 3.0856776e16 # m
         
+        # Columns of the planet table which are used by this module.
+        self.Columns = ['Ts', 'Rs', 'Ds']
+        
         pass
     
     def Compute(self,
@@ -55,29 +58,83 @@ class Photometry():
             Wavelength range in which the mission is operating.
         """
         
-        if (Unit == 'uJy'):
-            Flx = self.Flx_SI(Filter.Wavel, # m
-                              Sys.Ts[0], # K
-                              Sys.Rs[0], # Rsun
-                              Sys.Ds[0]) # pc
-            IntFlx = self.IntFlx_uJy(Flx, # W/m^3
-                                     Filter.Wavel, # m
-                                     Filter.Trans,
-                                     Filter.Width, # m
-                                     Filter.Mean) # m
-        elif (Unit == 'ph'):
-            Flx = self.Flx_ph(Filter.Wavel, # m
-                              Sys.Ts[0], # K
-                              Sys.Rs[0], # Rsun
-                              Sys.Ds[0]) # pc
-            IntFlx = self.IntFlx_ph(Flx, # ph/s/m^2/um
-                                    Filter.Wavel, # m
-                                    Filter.Trans,
-                                    Filter.Width, # m
-                                    Filter.Mean) # m
+        # The host star is the same in all universes. Its integrated flux with
+        # unit solid angle is cached by the filter for each distinct
+        # effective temperature, so that only the solid angle needs to be
+        # applied here.
+        IntFlx = Filter.getStarFlx(Sys.Ts[:1], # K
+                                   Unit)[0]*((Sys.Rs[0]*self.Rsun)/(Sys.Ds[0]*self.pc))**2
         
         return [IntFlx]*len(Sys.Nuniverse)
     
+    def ComputeBlock(self,
+                     Filter,
+                     Sys,
+                     Unit,
+                     Mission):
+        """
+        Parameters
+        ----------
+        Filter: instance
+            Instance of class Filter.
+        Sys: instance
+            Instance of class System containing a block of whole systems.
+        Unit: 'uJy', 'ph'
+            Unit in which the photometry should be computed.
+        Mission: 'MIR', 'VIS'
+            Wavelength range in which the mission is operating.
+        
+        Returns
+        -------
+        IntFlx: array
+            Integrated flux of each planet in the block.
+        """
+        
+        # The integrated flux of each distinct star is shared between the
+        # modules via the filter so that only the solid angle needs to be
+        # applied here.
+        IntFlx = Filter.getStarFlx(Sys.Ts, # K
+                                   Unit)*((Sys.Rs*self.Rsun)/(Sys.Ds*self.pc))**2
+        
+        return IntFlx
+    
+    def ComputeSweep(self,
+                     Filter,
+                     Sys,
+                     Units,
+                     Missions):
+        """
+        Parameters
+        ----------
+        Filter: instance
+            Instance of class Filter.
+        Sys: instance
+            Instance of class System containing a block of whole systems.
+        Units: list
+            List of units ('uJy', 'ph') in which the photometry should be
+            computed.
+        Missions: list
+            List of wavelength ranges ('MIR', 'VIS') in which the mission is
+            operating.
+        
+        Returns
+        -------
+        IntFlx: dict
+            Integrated flux of each planet in the block for each (unit,
+            mission) combination.
+        """
+        
+        # The host star flux doesn't depend on the mission.
+        IntFlx = {}
+        for Unit in Units:
+            IntFlx[Unit] = self.ComputeBlock(Filter,
+                                             Sys,
+                                             Unit,
+                                             Missions[0])
+        IntFlx = {(Unit, Mission): IntFlx[Unit] for Unit in Units for Mission in Missions}
+        
+        return IntFlx
+    
     def Flx_SI(self,
                Wavel, # m
                Ts, # K
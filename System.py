@@ -13,6 +13,29 @@
 import numpy as np
 
 
+# =============================================================================
+# ASARRAY
+# =============================================================================
+
+def asArray(Column):
+    """
+    Parameters
+    ----------
+    Column: list, array, None
+        Column of the planet table.
+    
+    Returns
+    -------
+    Column: array, None
+        Column of the planet table as array or None if it has not been read.
+    """
+    
+    if (Column is None):
+        return None
+    
+    return np.asarray(Column)
+
+
 # =============================================================================
 # SYSTEM
 # =============================================================================
@@ -107,35 +130,73 @@ class System():
             Host star right ascension (deg).
         Dec: list
             Host star declination (deg).
+        
+        Columns which have not been read from the planet table are None.
+        """
+        
+        self.Nuniverse = asArray(Nuniverse)
+        self.Rp = asArray(Rp) # Rearth
+        self.Porb = asArray(Porb) # d
+        self.Mp = asArray(Mp) # Mearth
+        self.ep = asArray(ep)
+        self.ip = asArray(ip) # rad
+        self.Omegap = asArray(Omegap) # rad
+        self.omegap = asArray(omegap) # rad
+        self.thetap = asArray(thetap) # rad
+        self.Abond = asArray(Abond)
+        self.AgeomVIS = asArray(AgeomVIS)
+        self.AgeomMIR = asArray(AgeomMIR)
+        self.z = asArray(z)
+        self.ap = asArray(ap) # au
+        self.rp = asArray(rp) # au
+        self.AngSep = asArray(AngSep) # arcsec
+        self.maxAngSep = asArray(maxAngSep) # arcsec
+        self.Fp = asArray(Fp) # Searth
+        self.fp = asArray(fp)
+        self.Tp = asArray(Tp) # K
+        self.Nstar = asArray(Nstar)
+        self.Rs = asArray(Rs) # Rsun
+        self.Ms = asArray(Ms) # Msun
+        self.Ts = asArray(Ts) # K
+        self.Ds = asArray(Ds) # pc
+        self.Stype = asArray(Stype)
+        self.RA = asArray(RA) # deg
+        self.Dec = asArray(Dec) # deg
+        
+        pass
+
+
+# =============================================================================
+# SYSTEMVIEW
+# =============================================================================
+
+class SystemView():
+    
+    # A system whose columns are views into the columns of the whole planet
+    # table, so that no per-system arrays have to be built.
+    __slots__ = ('Nuniverse', 'Rp', 'Porb', 'Mp', 'ep', 'ip', 'Omegap', 'omegap', 'thetap', 'Abond', 'AgeomVIS', 'AgeomMIR', 'z', 'ap', 'rp', 'AngSep', 'maxAngSep', 'Fp', 'fp', 'Tp', 'Nstar', 'Rs', 'Ms', 'Ts', 'Ds', 'Stype', 'RA', 'Dec')
+    
+    def __init__(self,
+                 Data,
+                 Start,
+                 End):
+        """
+        Parameters
+        ----------
+        Data: dict
+            Columns of the whole planet table with the same names as the
+            attributes of class System. Columns which have not been read are
+            None.
+        Start: int
+            Row of the first planet.
+        End: int
+            Row after the last planet.
         """
         
-        self.Nuniverse = np.array(Nuniverse)
-        self.Rp = np.array(Rp) # Rearth
-        self.Porb = np.array(Porb) # d
-        self.Mp = np.array(Mp) # Mearth
-        self.ep = np.array(ep)
-        self.ip = np.array(ip) # rad
-        self.Omegap = np.array(Omegap) # rad
-        self.omegap = np.array(omegap) # rad
-        self.thetap = np.array(thetap) # rad
-        self.Abond = np.array(Abond)
-        self.AgeomVIS = np.array(AgeomVIS)
-        self.AgeomMIR = np.array(AgeomMIR)
-        self.z = np.array(z)
-        self.ap = np.array(ap) # au
-        self.rp = np.array(rp) # au
-        self.AngSep = np.array(AngSep) # arcsec
-        self.maxAngSep = np.array(maxAngSep) # arcsec
-        self.Fp = np.array(Fp) # Searth
-        self.fp = np.array(fp)
-        self.Tp = np.array(Tp) # K
-        self.Nstar = np.array(Nstar)
-        self.Rs = np.array(Rs) # Rsun
-        self.Ms = np.array(Ms) # Msun
-        self.Ts = np.array(Ts) # K
-        self.Ds = np.array(Ds) # pc
-        self.Stype = np.array(Stype)
-        self.RA = np.array(RA) # deg
-        self.Dec = np.array(Dec) # deg
+        for Name in self.__slots__:
+            if (Data[Name] is None):
+                setattr(self, Name, None)
+            else:
+                setattr(self, Name, Data[Name][Start:End])
         
         pass
@@ -10,10 +10,138 @@
 # IMPORTS
 # =============================================================================
 
+import bz2
+import gzip
+import hashlib
+import io
+import lzma
 import numpy as np
+import os
+import shutil
+import subprocess
 import sys
 
 import System
+import TableWriter
+
+
+# =============================================================================
+# COMPRESSION
+# =============================================================================
+
+# Python module and external tools (fastest first) which can decompress planet
+# tables with the corresponding extension. The external tools decompress in
+# parallel (pigz, bgzip, lbzip2, pbzip2, xz >= 5.4) in a separate process.
+Compressions = {'.gz': (gzip, [['pigz', '-dc'], ['bgzip', '-dc', '-@', str(os.cpu_count())]]),
+                '.bz2': (bz2, [['lbzip2', '-dc'], ['pbzip2', '-dc']]),
+                '.xz': (lzma, [['xz', '-T0', '-dc']])}
+
+def getCompression(Path):
+    """
+    Parameters
+    ----------
+    Path: str
+        Path of the planet table.
+    
+    Returns
+    -------
+    Compression: str, None
+        Extension of the compressed planet table or None if the planet table
+        is not compressed.
+    """
+    
+    for Compression in Compressions.keys():
+        if (Path.endswith(Compression)):
+            return Compression
+    
+    return None
+
+def openTable(Path,
+              Parallel=True):
+    """
+    Parameters
+    ----------
+    Path: str
+        Path of the planet table.
+    Parallel: bool
+        If True, compressed planet tables are decompressed by an external
+        tool if available. The returned table is not seekable in this case.
+    
+    Returns
+    -------
+    Table: file
+        Planet table opened in binary mode, decompressed on the fly.
+    Process: instance, None
+        Instance of class subprocess.Popen of the external tool or None.
+    """
+    
+    Compression = getCompression(Path)
+    if (Compression is None):
+        return open(Path, 'rb'), None
+    
+    if (Parallel == True):
+        for Command in Compressions[Compression][1]:
+            if (shutil.which(Command[0]) is not None):
+                Process = subprocess.Popen(Command+[Path], stdout=subprocess.PIPE)
+                return Process.stdout, Process
+    
+    return Compressions[Compression][0].open(Path, 'rb'), None
+
+def closeTable(Table,
+               Process,
+               Check=False):
+    """
+    Parameters
+    ----------
+    Table: file
+        Planet table opened with openTable.
+    Process: instance, None
+        Instance of class subprocess.Popen of the external tool or None.
+    Check: bool
+        If True, the planet table has been read to the end and an error of the
+        external tool is raised.
+    """
+    
+    if (Process is not None and Check == True):
+        if (Process.wait() != 0):
+            Table.close()
+            raise IOError('Decompression failed with exit code %.0f' % Process.returncode)
+    Table.close()
+    if (Process is not None and Process.poll() is None):
+        Process.terminate()
+        Process.wait()
+    
+    pass
+
+
+# =============================================================================
+# GETBOUNDARIES
+# =============================================================================
+
+def getBoundaries(Nuniverse,
+                  Nstar):
+    """
+    Parameters
+    ----------
+    Nuniverse: array
+        Nuniverse column of the planet table.
+    Nstar: array
+        Nstar column of the planet table.
+    
+    Returns
+    -------
+    Offsets: array
+        Row of the first planet of each system followed by the total number
+        of planets.
+    """
+    
+    # A new system starts wherever Nuniverse or Nstar changes.
+    if (len(Nuniverse) == 0):
+        return np.array([0])
+    Change = np.where((Nuniverse[1:] != Nuniverse[:-1]) | (Nstar[1:] != Nstar[:-1]))[0]+1
+    Offsets = np.concatenate(([0], Change, [len(Nuniverse)]))
+    
+    return Offsets
 
 
 # =============================================================================
@@ -23,18 +151,64 @@ import System
 class SystemReader():
     
     def __init__(self,
-                 PathPlanetTable):
+                 PathPlanetTable,
+                 Stream=False,
+                 Cache=False,
+                 Parallel=True,
+                 Dtype=np.float64):
         """
         Parameters
         ----------
         PathPlanetTable: str
             Path of the planet table to be read.
+        Stream: bool
+            If True, reads the planet table line by line instead of loading
+            it into memory at once.
+        Cache: bool
+            If True, the parsed planet table is saved as one binary .npy file
+            per column next to the planet table and memory-mapped by later
+            runs instead of parsing the text again.
+        Parallel: bool
+            If True, compressed (.gz, .bz2, .xz) planet tables are
+            decompressed by a parallel external tool if available.
+        Dtype: dtype
+            Data type of the parsed float columns (np.float64 or np.float32).
         """
         
         # Print.
         print('--> Initializing SystemReader')
         
         self.PathPlanetTable = PathPlanetTable
+        self.Stream = Stream
+        self.Cache = Cache
+        self.Parallel = Parallel
+        self.Dtype = Dtype
+        self.Compression = getCompression(self.PathPlanetTable)
+        
+        # Path of the planet table without the extensions, from which the
+        # paths of the cache, the index and the output tables are derived.
+        self.PathBase = self.PathPlanetTable
+        if (self.Compression is not None):
+            self.PathBase = self.PathBase[:-len(self.Compression)]
+        self.PathBase = self.PathBase[:-4]
+        self.Cached = False
+        self.Data = None
+        self.PathIndex = self.PathBase+'_index.npz'
+        
+        # Systems which are read. If None, all systems are read.
+        self.Selection = None
+        
+        # Row of the first planet of the last system (or block of systems)
+        # which has been read.
+        self.Row = 0
+        self.CacheDir = self.PathBase+'_cache'
+        
+        # All columns in the order of the arguments of System.
+        self.Names = ['Nuniverse', 'Rp', 'Porb', 'Mp', 'ep', 'ip', 'Omegap', 'omegap', 'thetap', 'Abond', 'AgeomVIS', 'AgeomMIR', 'z', 'ap', 'rp', 'AngSep', 'maxAngSep', 'Fp', 'fp', 'Tp', 'Nstar', 'Rs', 'Ms', 'Ts', 'Ds', 'Stype', 'RA', 'Dec']
+        
+        # Columns which are parsed by nextBlock. If None, all columns are
+        # parsed.
+        self.Columns = None
         
         pass
     
@@ -42,16 +216,68 @@ class SystemReader():
         """
         """
         
-        # Open the planet table.
-        Table = open(self.PathPlanetTable, 'r')
-        self.Lines = Table.readlines()
-        self.Nlines = len(self.Lines)
-        Table.close()
+        # Memory-map the binary columns if they match the planet table. Only
+        # the header of the planet table is read in this case, also in
+        # streaming mode.
+        if (self.Cache == True and self.loadCache() == True):
+            self.Stream = False
+            Table, Process = openTable(self.PathPlanetTable, False)
+            self.setHeader([Table.readline().decode(), Table.readline().decode()])
+            closeTable(Table, Process)
+            self.Reset()
+            return
+        
+        # Open the planet table. In streaming mode, only keep the file handle
+        # and remember where the planets start so that the table can be
+        # rewound. The number of lines is unknown in this case. Compressed
+        # planet tables are decompressed on the fly.
+        if (self.Stream == True):
+            Header = self.openStream()
+            self.Size = None if (self.Compression is not None) else os.path.getsize(self.PathPlanetTable)
+            self.Nlines = None
+        else:
+            Table, Process = openTable(self.PathPlanetTable, self.Parallel)
+            self.Lines = io.TextIOWrapper(Table).readlines()
+            self.Nlines = len(self.Lines)
+            closeTable(Table, Process, True)
+            Header = self.Lines[:2]
+        
+        # Locate the columns of the planet table.
+        self.setHeader(Header)
+        
+        # Find the system boundaries once. In streaming mode, they are unknown
+        # until the planet table has been read.
+        if (self.Stream == True):
+            self.Offsets = None
+            self.Nsystems = None
+        else:
+            self.Offsets = self.getOffsets()
+            self.Nsystems = len(self.Offsets)-1
+        
+        # Reset the line counter.
+        self.Reset()
+        
+        # Save the binary columns and memory-map them.
+        if (self.Cache == True):
+            self.saveCache()
+            self.loadCache()
+            self.Reset()
+        
+        pass
+    
+    def setHeader(self,
+                  Header):
+        """
+        Parameters
+        ----------
+        Header: list
+            List of str containing the two header lines of the planet table.
+        """
         
         # The second line (i = 1) contains the column names of the new P-pop
         # while the first line (i = 0) contains the column names of the old
         # P-pop.
-        tempLine = np.array(self.Lines[1].split('\t'))
+        tempLine = np.array(Header[1].split('\t'))
         self.ColNuniverse = np.where(tempLine == 'Nuniverse')[0][0]
         self.ColRp = np.where(tempLine == 'Rp')[0][0]
         self.ColPorb = np.where(tempLine == 'Porb')[0][0]
@@ -81,17 +307,662 @@ class SystemReader():
         self.ColRA = np.where(tempLine == 'RA')[0][0]
         self.ColDec = np.where(tempLine == 'Dec')[0][0]
         
-        # Reset the line counter.
+        self.Col = {}
+        for Name in self.Names:
+            self.Col[Name] = getattr(self, 'Col'+Name)
+        
+        pass
+    
+    def setColumns(self,
+                   Columns):
+        """
+        Parameters
+        ----------
+        Columns: list, None
+            Names of the columns which should be parsed by nextBlock. Nuniverse
+            and Nstar are always parsed. If None, all columns are parsed.
+        """
+        
+        if (Columns is None):
+            self.Columns = None
+        else:
+            self.Columns = [Name for Name in self.Names if (Name in Columns or Name in ['Nuniverse', 'Nstar'])]
+            print('--> Parsing columns '+', '.join(self.Columns))
+        
+        # The parsed columns have to be parsed again.
+        if (self.Cached == False):
+            self.Data = None
+        
+        pass
+    
+    def getKey(self,
+               Hash=True):
+        """
+        Parameters
+        ----------
+        Hash: bool
+            If True, the content of the planet table is hashed.
+        
+        Returns
+        -------
+        Key: dict
+            Size, modification time and (optionally) content hash of the
+            planet table.
+        """
+        
+        Key = {'Size': os.path.getsize(self.PathPlanetTable),
+               'Mtime': os.path.getmtime(self.PathPlanetTable),
+               'Hash': None}
+        if (Hash == True):
+            tempHash = hashlib.sha1()
+            Table = open(self.PathPlanetTable, 'rb')
+            Chunk = Table.read(2**20)
+            while (len(Chunk) > 0):
+                tempHash.update(Chunk)
+                Chunk = Table.read(2**20)
+            Table.close()
+            Key['Hash'] = tempHash.hexdigest()
+        
+        return Key
+    
+    def checkKey(self,
+                 Data):
+        """
+        Parameters
+        ----------
+        Data: dict
+            Size, modification time and content hash of the planet table
+            from which a cache or index was built.
+        
+        Returns
+        -------
+        Flag: bool
+            True if the planet table has not changed since.
+        """
+        
+        # The size is checked first. The content is only hashed if the
+        # modification time has changed, so that touching the planet table
+        # does not invalidate the cache or index.
+        Key = self.getKey(Hash=False)
+        if (int(Data['Size']) != Key['Size']):
+            return False
+        if (float(Data['Mtime']) != Key['Mtime']):
+            if (str(Data['Hash']) != self.getKey()['Hash']):
+                return False
+        
+        return True
+    
+    def loadCache(self):
+        """
+        Returns
+        -------
+        Flag: bool
+            True if binary columns matching the planet table were
+            memory-mapped.
+        """
+        
+        PathKey = os.path.join(self.CacheDir, 'Key.npz')
+        if (os.path.exists(PathKey) == False):
+            return False
+        
+        if (self.checkKey(np.load(PathKey)) == False):
+            return False
+        
+        # The binary columns must have been saved in the same precision.
+        Data = {}
+        for Name in self.Names:
+            Data[Name] = np.load(os.path.join(self.CacheDir, Name+'.npy'), mmap_mode='r')
+        if (Data['Ts'].dtype != self.Dtype):
+            return False
+        self.Data = Data
+        self.Nlines = len(self.Data['Nuniverse'])+2
+        self.Cached = True
+        self.Offsets = self.getOffsets()
+        self.Nsystems = len(self.Offsets)-1
+        
+        # Print.
+        print('--> Using cache '+self.CacheDir)
+        
+        return True
+    
+    def saveCache(self):
+        """
+        """
+        
+        # Print.
+        print('--> Writing cache '+self.CacheDir)
+        
+        # The key is removed first and written last so that an incomplete
+        # cache is never used.
+        if (os.path.exists(self.CacheDir) == False):
+            os.makedirs(self.CacheDir)
+        PathKey = os.path.join(self.CacheDir, 'Key.npz')
+        if (os.path.exists(PathKey) == True):
+            os.remove(PathKey)
+        
+        # Parse the planet table in chunks and append each chunk to the binary
+        # columns, so that the parsed planet table is never held in memory.
+        # The spectral types are written as codes first since the length of
+        # the longest one is only known at the end.
+        Writers = {}
+        for Name in self.Names:
+            if (Name in ['Nuniverse', 'Nstar']):
+                Writers[Name] = TableWriter.NpyWriter(self.CacheDir, [Name], int)
+            elif (Name == 'Stype'):
+                Writers[Name] = TableWriter.NpyWriter(self.CacheDir, ['Stype_codes'], int)
+            else:
+                Writers[Name] = TableWriter.NpyWriter(self.CacheDir, [Name], self.Dtype)
+        Types = {}
+        Lines = self.readLines(100000)
+        while (len(Lines) > 0):
+            self.parseLines(Lines, None)
+            for Name in self.Names:
+                if (Name == 'Stype'):
+                    Unique, Inv = np.unique(self.Stype, return_inverse=True)
+                    Codes = np.array([Types.setdefault(Type, len(Types)) for Type in Unique], dtype=int)[Inv.ravel()]
+                    Writers[Name].Write(Codes[np.newaxis])
+                else:
+                    Writers[Name].Write(getattr(self, Name)[np.newaxis])
+            Lines = self.readLines(100000)
+        for Name in self.Names:
+            Writers[Name].Close()
+        
+        # Translate the codes into the spectral types in chunks.
+        PathCodes = os.path.join(self.CacheDir, 'Stype_codes.npy')
+        Codes = np.load(PathCodes, mmap_mode='r')
+        Types = np.array(list(Types.keys()), dtype=str)
+        Writer = TableWriter.NpyWriter(self.CacheDir, ['Stype'], Types.dtype)
+        for i in range(0, len(Codes), 100000):
+            Writer.Write(Types[Codes[i:i+100000]][np.newaxis])
+        Writer.Close()
+        del Codes
+        os.remove(PathCodes)
+        
+        Key = self.getKey()
+        np.savez(PathKey,
+                 Size=Key['Size'],
+                 Mtime=Key['Mtime'],
+                 Hash=Key['Hash'])
+        
+        # The text is not needed anymore.
+        self.Close()
+        self.Stream = False
+        self.Lines = None
+        
+        pass
+    
+    def getOffsets(self):
+        """
+        Returns
+        -------
+        Offsets: array
+            Row of the first planet of each system (same Nuniverse and Nstar)
+            in the planet table followed by the total number of planets, so
+            that system i consists of the rows Offsets[i] to Offsets[i+1].
+        """
+        
+        # Get the Nuniverse and Nstar columns. In streaming mode, the planet
+        # table is read once in chunks and rewound afterwards.
+        if (self.Cached == True):
+            Nuniverse = self.Data['Nuniverse']
+            Nstar = self.Data['Nstar']
+        elif (self.Stream == True):
+            self.Reset()
+            Nuniverse = []
+            Nstar = []
+            Lines = self.readLines(100000)
+            while (len(Lines) > 0):
+                self.parseLines(Lines, ['Nuniverse', 'Nstar'])
+                Nuniverse += [self.Nuniverse]
+                Nstar += [self.Nstar]
+                Lines = self.readLines(100000)
+            Nuniverse = np.concatenate(Nuniverse) if (len(Nuniverse) > 0) else np.array([], dtype=int)
+            Nstar = np.concatenate(Nstar) if (len(Nstar) > 0) else np.array([], dtype=int)
+            self.Reset()
+        elif (self.Nlines > 2):
+            self.parseLines(self.Lines[2:], ['Nuniverse', 'Nstar'])
+            Nuniverse = self.Nuniverse
+            Nstar = self.Nstar
+        else:
+            Nuniverse = np.array([], dtype=int)
+            Nstar = np.array([], dtype=int)
+        
+        return getBoundaries(Nuniverse, Nstar)
+    
+    def loadIndex(self):
+        """
+        Returns
+        -------
+        Flag: bool
+            True if an index matching the planet table was loaded.
+        """
+        
+        if (os.path.exists(self.PathIndex) == False):
+            return False
+        Data = np.load(self.PathIndex)
+        if (self.checkKey(Data) == False):
+            return False
+        self.Index = {}
+        for Key in ['Offsets', 'Bytes', 'Nuniverse', 'Nstar']:
+            self.Index[Key] = Data[Key]
+        
+        return True
+    
+    def saveIndex(self):
+        """
+        """
+        
+        # Print.
+        print('--> Writing index '+self.PathIndex)
+        
+        # Go through the planet table in binary mode so that the byte offset
+        # of each line is known, independent of the line endings.
+        Table, Process = openTable(self.PathPlanetTable, self.Parallel)
+        Start = len(Table.readline())+len(Table.readline())
+        Lengths = []
+        Nuniverse = []
+        Nstar = []
+        Lines = Table.readlines(2**24)
+        while (len(Lines) > 0):
+            Lengths += [np.array([len(Line) for Line in Lines])]
+            self.parseLines([Line.decode() for Line in Lines], ['Nuniverse', 'Nstar'])
+            Nuniverse += [self.Nuniverse]
+            Nstar += [self.Nstar]
+            Lines = Table.readlines(2**24)
+        closeTable(Table, Process, True)
+        if (len(Lengths) == 0):
+            Lengths = [np.array([], dtype=int)]
+            Nuniverse = [np.array([], dtype=int)]
+            Nstar = [np.array([], dtype=int)]
+        Nuniverse = np.concatenate(Nuniverse)
+        Nstar = np.concatenate(Nstar)
+        
+        # Row and byte offset of each system, followed by the total number of
+        # planets and the size of the planet table.
+        Offsets = getBoundaries(Nuniverse, Nstar)
+        Bytes = Start+np.concatenate(([0], np.cumsum(np.concatenate(Lengths))))
+        self.Index = {'Offsets': Offsets,
+                      'Bytes': Bytes[Offsets],
+                      'Nuniverse': Nuniverse[Offsets[:-1]],
+                      'Nstar': Nstar[Offsets[:-1]]}
+        Key = self.getKey()
+        np.savez(self.PathIndex,
+                 Size=Key['Size'],
+                 Mtime=Key['Mtime'],
+                 Hash=Key['Hash'],
+                 **self.Index)
+        
+        pass
+    
+    def setUniverses(self,
+                     Universes):
+        """
+        Parameters
+        ----------
+        Universes: list, None
+            Numbers of the universes (Nuniverse) which should be read. If None,
+            all universes are read.
+        
+        In streaming mode, the selected systems are located with an index of
+        the row and byte offset of each system, which is saved next to the
+        planet table. Otherwise, the system boundaries are known already.
+        """
+        
+        if (Universes is None):
+            self.Selection = None
+            self.Reset()
+            return
+        
+        if (self.Offsets is None):
+            if (self.loadIndex() == False):
+                self.saveIndex()
+        else:
+            if (self.Cached == True):
+                Nuniverse = self.Data['Nuniverse'][self.Offsets[:-1]]
+            elif (self.Nsystems > 0):
+                self.parseLines([self.Lines[2+k] for k in self.Offsets[:-1]], ['Nuniverse', 'Nstar'])
+                Nuniverse = self.Nuniverse
+            else:
+                Nuniverse = np.array([], dtype=int)
+            self.Index = {'Offsets': self.Offsets,
+                          'Nuniverse': Nuniverse}
+        
+        # Selected systems and, for each of them, the end of the contiguous
+        # range of selected systems to which it belongs, so that blocks never
+        # extend over systems which are not selected.
+        self.Selection = np.where(np.isin(self.Index['Nuniverse'], Universes))[0]
+        if (len(self.Selection) == 0):
+            print('--> WARNING: No system of the selected universes in the planet table')
+        Break = np.where(np.diff(self.Selection) != 1)[0]+1
+        Bounds = np.concatenate(([0], Break, [len(self.Selection)]))
+        Ends = self.Selection[Bounds[1:]-1]+1 if (len(self.Selection) > 0) else np.array([], dtype=int)
+        self.SelectionEnd = np.repeat(Ends, np.diff(Bounds))
+        Offsets = self.Index['Offsets']
+        self.Nselected = int(np.sum(Offsets[self.Selection+1]-Offsets[self.Selection]))
+        print('--> Reading %.0f universes, %.0f systems, %.0f planets' % (len(np.unique(self.Index['Nuniverse'][self.Selection])), len(self.Selection), self.Nselected))
         self.Reset()
         
         pass
     
+    def readSelection(self,
+                      Nplanets):
+        """
+        Parameters
+        ----------
+        Nplanets: int
+            Minimum number of planets.
+        
+        Returns
+        -------
+        Sys: instance, None
+            Instance of class System or SystemView (binary columns)
+            containing the next selected systems, as many as needed to reach
+            at least Nplanets planets without extending over systems which
+            are not selected.
+        """
+        
+        if (self.Next >= len(self.Selection)):
+            return None
+        
+        # Find the last system which is needed to reach Nplanets planets.
+        Offsets = self.Index['Offsets']
+        i = self.Selection[self.Next]
+        j = min(np.searchsorted(Offsets, Offsets[i]+Nplanets), self.SelectionEnd[self.Next])
+        self.Next += j-i
+        self.Done += Offsets[j]-Offsets[i]
+        self.Row = int(Offsets[i])
+        
+        # Only parse the lines of the selected systems. In streaming mode,
+        # seek the first system and read the lines up to the last system.
+        if (self.Cached == True):
+            Sys = System.SystemView(self.Data, Offsets[i], Offsets[j])
+        else:
+            if (self.Stream == True):
+                self.Table.seek(self.Index['Bytes'][i])
+                Lines = self.Table.read(self.Index['Bytes'][j]-self.Index['Bytes'][i]).decode().splitlines()
+            else:
+                Lines = self.Lines[2+Offsets[i]:2+Offsets[j]]
+            self.parseLines(Lines, self.Columns)
+            Sys = self.makeSystem()
+        
+        self.printProgress()
+        
+        return Sys
+    
+    def getLineBytes(self,
+                     Nlines=1000):
+        """
+        Parameters
+        ----------
+        Nlines: int
+            Number of lines from which the memory is estimated.
+        
+        Returns
+        -------
+        Bytes: int
+            Estimated memory (B) taken by the text of one planet while a block
+            is read in streaming mode or 0 if the planet table is not
+            streamed.
+        """
+        
+        if (self.Stream == False):
+            return 0
+        
+        # Each line is held as a str referenced by a list. Selected universes
+        # are read as bytes before they are decoded.
+        Lines = self.readLines(Nlines)
+        self.Reset()
+        if (len(Lines) == 0):
+            return 0
+        Bytes = max([sys.getsizeof(Line) for Line in Lines])+8 # B
+        if (self.Selection is not None):
+            Bytes += max([len(Line) for Line in Lines]) # B
+        
+        return Bytes
+    
+    def getEnd(self,
+               Start,
+               Nplanets):
+        """
+        Parameters
+        ----------
+        Start: int
+            Row of the first planet.
+        Nplanets: int
+            Minimum number of planets.
+        
+        Returns
+        -------
+        End: int
+            Row after the last planet of the first system which ends at least
+            Nplanets rows after Start.
+        """
+        
+        i = np.searchsorted(self.Offsets, Start+Nplanets)
+        
+        return int(self.Offsets[min(i, len(self.Offsets)-1)])
+    
+    def getData(self):
+        """
+        Returns
+        -------
+        Data: dict
+            Columns of the whole planet table. If the binary columns are not
+            used, the selected columns are parsed from the lines on the first
+            call. Columns which have not been read are None.
+        """
+        
+        if (self.Data is None):
+            self.parseLines(self.Lines[2:], self.Columns)
+            self.Data = {}
+            for Name in self.Names:
+                self.Data[Name] = getattr(self, Name)
+        
+        return self.Data
+    
+    def openStream(self):
+        """
+        Returns
+        -------
+        Header: list
+            List of str containing the two header lines of the planet table.
+        """
+        
+        # Only uncompressed planet tables and the Python decompressors can
+        # seek, which is required to read selected universes.
+        Parallel = (self.Parallel == True and self.Selection is None)
+        self.Table, self.Process = openTable(self.PathPlanetTable, Parallel)
+        Header = [self.Table.readline().decode(), self.Table.readline().decode()]
+        self.DataStart = len(Header[0].encode())+len(Header[1].encode())
+        self.Buffer = None
+        
+        return Header
+    
     def Reset(self):
         """
         """
         
         # The third line (i = 2) is the first line that contains planets.
+        # Compressed planet tables are opened again instead of seeking.
         self.Counter = 2
+        self.Next = 0
+        self.Done = 0
+        self.Row = 0
+        if (self.Stream == True):
+            if (self.Compression is None):
+                self.Table.seek(self.DataStart)
+                self.Buffer = None
+            else:
+                self.Close()
+                self.openStream()
+        
+        pass
+    
+    def Seek(self,
+             Row):
+        """
+        Parameters
+        ----------
+        Row: int
+            Row of the first planet of the system at which reading should
+            continue.
+        """
+        
+        self.Reset()
+        
+        # The first row doesn't need to be located.
+        if (Row == 0):
+            return
+        
+        # Skip the selected systems before the row.
+        if (self.Selection is not None):
+            Offsets = self.Index['Offsets']
+            self.Next = int(np.searchsorted(Offsets[self.Selection], Row))
+            self.Done = int(np.sum(Offsets[self.Selection[:self.Next]+1]-Offsets[self.Selection[:self.Next]]))
+        
+        # Move the line counter to the row.
+        elif (self.Offsets is not None):
+            self.Counter = Row+2
+        
+        # Uncompressed planet tables are located with the index, compressed
+        # ones are read up to the row.
+        elif (self.Compression is None):
+            if (self.loadIndex() == False):
+                self.saveIndex()
+            i = np.searchsorted(self.Index['Offsets'], Row)
+            self.Table.seek(self.Index['Bytes'][i])
+            self.Buffer = None
+            self.Counter = int(self.Index['Offsets'][i])+2
+        else:
+            while (self.Counter-2 < Row and len(self.readLines(min(Row-self.Counter+2, 100000))) > 0):
+                pass
+        
+        pass
+    
+    def Close(self):
+        """
+        """
+        
+        if (self.Stream == True):
+            closeTable(self.Table, self.Process)
+        
+        pass
+    
+    def peekLine(self):
+        """
+        Returns
+        -------
+        Line: str, None
+            Line of the planet table at the line counter or None if the end
+            of the planet table is reached.
+        """
+        
+        if (self.Stream == True):
+            if (self.Buffer is None):
+                self.Buffer = self.Table.readline().decode()
+                if (self.Buffer == '' and self.Process is not None and self.Process.wait() != 0):
+                    raise IOError('Decompression failed with exit code %.0f' % self.Process.returncode)
+            if (self.Buffer == ''):
+                return None
+            return self.Buffer
+        
+        if (self.Counter < self.Nlines):
+            return self.Lines[self.Counter]
+        
+        return None
+    
+    def skipLine(self):
+        """
+        """
+        
+        # Advance the line counter.
+        self.Counter += 1
+        if (self.Stream == True):
+            self.Buffer = None
+        
+        pass
+    
+    def readLines(self,
+                  Nlines):
+        """
+        Parameters
+        ----------
+        Nlines: int
+            Max number of lines to be read.
+        
+        Returns
+        -------
+        Lines: list
+            List of str containing the next lines of the planet table.
+        """
+        
+        if (self.Stream == True):
+            Lines = []
+            tempLine = self.peekLine()
+            while (tempLine is not None and len(Lines) < Nlines):
+                Lines += [tempLine]
+                self.skipLine()
+                tempLine = self.peekLine()
+        else:
+            Lines = self.Lines[self.Counter:self.Counter+Nlines]
+            self.Counter += len(Lines)
+        
+        return Lines
+    
+    def parseLines(self,
+                   Lines,
+                   Columns):
+        """
+        Parameters
+        ----------
+        Lines: list
+            List of str containing lines of the planet table.
+        Columns: list, None
+            Names of the columns which should be parsed. If None, all columns
+            are parsed.
+        
+        Sets the columns of the planet table from the lines using the C parser
+        of NumPy. Only the selected columns are parsed, all other columns are
+        set to None.
+        """
+        
+        if (Columns is None):
+            Columns = self.Names
+        Numeric = [Name for Name in Columns if (Name != 'Stype')]
+        Data = np.loadtxt(Lines,
+                          delimiter='\t',
+                          usecols=[self.Col[Name] for Name in Numeric],
+                          ndmin=2)
+        for Name in self.Names:
+            setattr(self, Name, None)
+        for i, Name in enumerate(Numeric):
+            setattr(self, Name, Data[:, i].astype(self.Dtype, copy=False))
+        self.Nuniverse = Data[:, Numeric.index('Nuniverse')].astype(int)
+        self.Nstar = Data[:, Numeric.index('Nstar')].astype(int)
+        if ('Stype' in Columns):
+            self.Stype = np.loadtxt(Lines,
+                                    delimiter='\t',
+                                    usecols=self.ColStype,
+                                    dtype=str,
+                                    ndmin=1)
+        
+        pass
+    
+    def printProgress(self):
+        """
+        """
+        
+        # In streaming mode, the progress is estimated from the position in
+        # the planet table.
+        if (self.Selection is not None):
+            sys.stdout.write('\r--> Planet %.0f of %.0f' % (self.Done, self.Nselected))
+        elif (self.Stream == True and self.Size is None):
+            sys.stdout.write('\r--> Planet %.0f' % (self.Counter-1))
+        elif (self.Stream == True):
+            sys.stdout.write('\r--> Planet %.0f (%.1f%%)' % ((self.Counter-1), 100.*self.Table.tell()/self.Size))
+        else:
+            sys.stdout.write('\r--> Planet %.0f of %.0f' % ((self.Counter-1), self.Nlines-2))
+        sys.stdout.flush()
         
         pass
     
@@ -130,60 +1001,56 @@ class SystemReader():
         
         pass
     
-    def nextSystem(self):
+    def addLine(self,
+                tempLine):
         """
-        Returns
-        -------
-        Sys: instance, None
-            Instance of class System.
+        Parameters
+        ----------
+        tempLine: list
+            List of str containing the columns of one line of the planet
+            table.
         """
         
-        # Clear the system.
-        self.Clear()
+        self.Nuniverse += [int(tempLine[self.ColNuniverse])]
+        self.Rp += [float(tempLine[self.ColRp])] # Rearth
+        self.Porb += [float(tempLine[self.ColPorb])] # d
+        self.Mp += [float(tempLine[self.ColMp])] # Mearth
+        self.ep += [float(tempLine[self.Colep])]
+        self.ip += [float(tempLine[self.Colip])] # rad
+        self.Omegap += [float(tempLine[self.ColOmegap])] # rad
+        self.omegap += [float(tempLine[self.Colomegap])] # rad
+        self.thetap += [float(tempLine[self.Colthetap])] # rad
+        self.Abond += [float(tempLine[self.ColAbond])]
+        self.AgeomVIS += [float(tempLine[self.ColAgeomVIS])]
+        self.AgeomMIR += [float(tempLine[self.ColAgeomMIR])]
+        self.z += [float(tempLine[self.Colz])]
+        self.ap += [float(tempLine[self.Colap])] # au
+        self.rp += [float(tempLine[self.Colrp])] # au
+        self.AngSep += [float(tempLine[self.ColAngSep])] # arcsec
+        self.maxAngSep += [float(tempLine[self.ColmaxAngSep])] # arcsec
+        self.Fp += [float(tempLine[self.ColFp])] # Searth
+        self.fp += [float(tempLine[self.Colfp])]
+        self.Tp += [float(tempLine[self.ColTp])] # K
+        self.Nstar += [int(tempLine[self.ColNstar])]
+        self.Rs += [float(tempLine[self.ColRs])] # Rsun
+        self.Ms += [float(tempLine[self.ColMs])] # Msun
+        self.Ts += [float(tempLine[self.ColTs])] # K
+        self.Ds += [float(tempLine[self.ColDs])] # pc
+        self.Stype += [str(tempLine[self.ColStype])]
+        self.RA += [float(tempLine[self.ColRA])] # deg
+        self.Dec += [float(tempLine[self.ColDec])] # deg
         
-        # If there is no planet in the system yet or if the current planet
-        # belongs to the same universe and the same star, add the current
-        # planet to the system.
-        if (self.Counter < self.Nlines):
-            tempLine = self.Lines[self.Counter].split('\t')
-        else:
-            return None
-        while (len(self.Nuniverse) == 0 or (self.Nuniverse[-1] == int(tempLine[self.ColNuniverse]) and self.Nstar[-1] == int(tempLine[self.ColNstar]))):
-            self.Nuniverse += [int(tempLine[self.ColNuniverse])]
-            self.Rp += [float(tempLine[self.ColRp])] # Rearth
-            self.Porb += [float(tempLine[self.ColPorb])] # d
-            self.Mp += [float(tempLine[self.ColMp])] # Mearth
-            self.ep += [float(tempLine[self.Colep])]
-            self.ip += [float(tempLine[self.Colip])] # rad
-            self.Omegap += [float(tempLine[self.ColOmegap])] # rad
-            self.omegap += [float(tempLine[self.Colomegap])] # rad
-            self.thetap += [float(tempLine[self.Colthetap])] # rad
-            self.Abond += [float(tempLine[self.ColAbond])]
-            self.AgeomVIS += [float(tempLine[self.ColAgeomVIS])]
-            self.AgeomMIR += [float(tempLine[self.ColAgeomMIR])]
-            self.z += [float(tempLine[self.Colz])]
-            self.ap += [float(tempLine[self.Colap])] # au
-            self.rp += [float(tempLine[self.Colrp])] # au
-            self.AngSep += [float(tempLine[self.ColAngSep])] # arcsec
-            self.maxAngSep += [float(tempLine[self.ColmaxAngSep])] # arcsec
-            self.Fp += [float(tempLine[self.ColFp])] # Searth
-            self.fp += [float(tempLine[self.Colfp])]
-            self.Tp += [float(tempLine[self.ColTp])] # K
-            self.Nstar += [int(tempLine[self.ColNstar])]
-            self.Rs += [float(tempLine[self.ColRs])] # Rsun
-            self.Ms += [float(tempLine[self.ColMs])] # Msun
-            self.Ts += [float(tempLine[self.ColTs])] # K
-            self.Ds += [float(tempLine[self.ColDs])] # pc
-            self.Stype += [str(tempLine[self.ColStype])]
-            self.RA += [float(tempLine[self.ColRA])] # deg
-            self.Dec += [float(tempLine[self.ColDec])] # deg
-            self.Counter += 1
-            if (self.Counter < self.Nlines):
-                tempLine = self.Lines[self.Counter].split('\t')
-            else:
-                break
+        pass
+    
+    def makeSystem(self):
+        """
+        Returns
+        -------
+        Sys: instance
+            Instance of class System containing all planets which have been
+            added since the last call of Clear.
+        """
         
-        # Create the system.
         Sys = System.System(self.Nuniverse,
                             self.Rp, # Rearth
                             self.Porb, # d
@@ -213,7 +1080,114 @@ class SystemReader():
                             self.RA, # deg
                             self.Dec) # deg
         
-        sys.stdout.write('\r--> Planet %.0f of %.0f' % ((self.Counter-1), self.Nlines-2))
-        sys.stdout.flush()
+        return Sys
+    
+    def nextSystem(self):
+        """
+        Returns
+        -------
+        Sys: instance, None
+            Instance of class System (streaming mode) or SystemView.
+        """
+        
+        # Read the next selected system.
+        if (self.Selection is not None):
+            return self.readSelection(1)
+        
+        # Read the system between the next two system boundaries.
+        if (self.Offsets is not None):
+            Start = self.Counter-2
+            if (Start >= self.Offsets[-1]):
+                return None
+            End = self.getEnd(Start, 1)
+            self.Counter = End+2
+            self.Row = Start
+            Sys = System.SystemView(self.getData(), Start, End)
+            self.printProgress()
+            return Sys
+        
+        # Clear the system.
+        self.Clear()
+        self.Row = self.Counter-2
+        
+        # If there is no planet in the system yet or if the current planet
+        # belongs to the same universe and the same star, add the current
+        # planet to the system.
+        tempLine = self.peekLine()
+        if (tempLine is None):
+            return None
+        tempLine = tempLine.split('\t')
+        while (len(self.Nuniverse) == 0 or (self.Nuniverse[-1] == int(tempLine[self.ColNuniverse]) and self.Nstar[-1] == int(tempLine[self.ColNstar]))):
+            self.addLine(tempLine)
+            self.skipLine()
+            tempLine = self.peekLine()
+            if (tempLine is None):
+                break
+            tempLine = tempLine.split('\t')
+        
+        # Create the system.
+        Sys = self.makeSystem()
+        
+        self.printProgress()
+        
+        return Sys
+    
+    def nextBlock(self,
+                  Nplanets):
+        """
+        Parameters
+        ----------
+        Nplanets: int
+            Minimum number of planets in the block.
+        
+        Returns
+        -------
+        Sys: instance, None
+            Instance of class System (streaming mode) or SystemView
+            containing as many whole systems as needed to reach at least
+            Nplanets planets.
+        """
+        
+        # Read the next selected systems.
+        if (self.Selection is not None):
+            return self.readSelection(Nplanets)
+        
+        # Read whole systems up to the first system boundary at least
+        # Nplanets planets ahead.
+        if (self.Offsets is not None):
+            Start = self.Counter-2
+            if (Start >= self.Offsets[-1]):
+                return None
+            End = self.getEnd(Start, Nplanets)
+            self.Counter = End+2
+            self.Row = Start
+            Sys = System.SystemView(self.getData(), Start, End)
+            self.printProgress()
+            return Sys
+        
+        # Read Nplanets lines. Then keep reading lines until the end of the
+        # current system is reached so that no system is split between two
+        # blocks.
+        self.Row = self.Counter-2
+        Lines = self.readLines(Nplanets)
+        if (len(Lines) == 0):
+            return None
+        Last = Lines[-1].split('\t')
+        Line = self.peekLine()
+        while (Line is not None):
+            tempLine = Line.split('\t')
+            if (int(Last[self.ColNuniverse]) != int(tempLine[self.ColNuniverse]) or int(Last[self.ColNstar]) != int(tempLine[self.ColNstar])):
+                break
+            Lines += [Line]
+            self.skipLine()
+            Line = self.peekLine()
+        
+        # Parse the block at once.
+        self.parseLines(Lines, self.Columns)
+        
+        # Create the block.
+        Sys = self.makeSystem()
+        
+        self.printProgress()
         
         return Sys
@@ -0,0 +1,463 @@
+"""
+# =============================================================================
+# P-POP PHOTOMETRY
+# A photometry tool for P-POP
+# =============================================================================
+"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+import os
+import sqlite3
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+# =============================================================================
+# GETNPYHEADER
+# =============================================================================
+
+def getNpyHeader(Dtype,
+                 Nrows,
+                 Size=128):
+    """
+    Parameters
+    ----------
+    Dtype: type
+        Data type of the column.
+    Nrows: int
+        Number of rows of the column.
+    Size: int
+        Size (B) of the header. The header has a fixed size so that it can be
+        rewritten once the number of rows is known.
+    
+    Returns
+    -------
+    Header: bytes
+        Header of a .npy file (format version 1.0).
+    """
+    
+    Dict = repr({'descr': np.lib.format.dtype_to_descr(np.dtype(Dtype)),
+                 'fortran_order': False,
+                 'shape': (Nrows,)})
+    Dict = Dict.ljust(Size-len(np.lib.format.MAGIC_PREFIX)-4-1)+'\n'
+    Header = np.lib.format.magic(1, 0)+np.uint16(len(Dict)).astype('<u2').tobytes()+Dict.encode('latin1')
+    
+    return Header
+
+
+# =============================================================================
+# TABLEWRITER
+# =============================================================================
+
+class TableWriter():
+    
+    def __init__(self,
+                 Path,
+                 Header,
+                 BufferSize=2**22,
+                 Position=None):
+        """
+        Parameters
+        ----------
+        Path: str
+            Path of the output table.
+        Header: list
+            List of str containing the header lines of the output table.
+        BufferSize: int
+            Number of characters which are buffered before they are written
+            to the output table.
+        Position: int, None
+            Size (B) of an existing output table returned by Tell, at which
+            writing should continue. Everything after it is truncated. If
+            None, a new output table is created.
+        """
+        
+        self.Path = Path
+        self.BufferSize = BufferSize
+        
+        # Keep the output table open until it is closed.
+        if (Position is None):
+            self.Table = open(self.Path, 'w')
+            self.Table.write(''.join(Header))
+        else:
+            self.Table = open(self.Path, 'r+')
+            self.Table.truncate(Position)
+            self.Table.seek(Position)
+        self.Buffer = []
+        self.Nbuffer = 0
+        
+        pass
+    
+    def Write(self,
+              Columns):
+        """
+        Parameters
+        ----------
+        Columns: array
+            Columns of the output table along the first and rows along the
+            second axis.
+        """
+        
+        # Format all rows at once.
+        Ncolumns, Nrows = Columns.shape
+        if (Nrows == 0):
+            return
+        Text = (('%018.12f\t'*Ncolumns+'\n')*Nrows) % tuple(np.asarray(Columns, dtype=float).T.ravel().tolist())
+        self.Buffer += [Text]
+        self.Nbuffer += len(Text)
+        if (self.Nbuffer >= self.BufferSize):
+            self.Flush()
+        
+        pass
+    
+    def Flush(self):
+        """
+        """
+        
+        self.Table.write(''.join(self.Buffer))
+        self.Table.flush()
+        self.Buffer = []
+        self.Nbuffer = 0
+        
+        pass
+    
+    def Close(self):
+        """
+        """
+        
+        self.Flush()
+        self.Table.close()
+        
+        pass
+    
+    def Tell(self):
+        """
+        Returns
+        -------
+        Position: int
+            Size (B) of the output table after flushing the buffer.
+        """
+        
+        self.Flush()
+        
+        return self.Table.tell()
+
+
+# =============================================================================
+# NPYWRITER
+# =============================================================================
+
+class NpyWriter():
+    
+    def __init__(self,
+                 Path,
+                 Names,
+                 Dtype=np.float64,
+                 Position=None):
+        """
+        Parameters
+        ----------
+        Path: str
+            Path of the directory to which the columns of the output table are
+            written as .npy files.
+        Names: list
+            List of str containing the names of the columns.
+        Dtype: type
+            Data type of the columns.
+        Position: int, None
+            Number of rows of an existing output table returned by Tell, at
+            which writing should continue. Everything after it is truncated.
+            If None, a new output table is created.
+        """
+        
+        self.Path = Path
+        self.Names = Names
+        self.Dtype = np.dtype(Dtype)
+        
+        # Keep one file per column open until it is closed. The header is
+        # rewritten with the final number of rows when the file is closed.
+        if (os.path.exists(self.Path) == False):
+            os.makedirs(self.Path)
+        self.Tables = []
+        for Name in self.Names:
+            if (Position is None):
+                Table = open(os.path.join(self.Path, Name+'.npy'), 'wb')
+                Table.write(getNpyHeader(self.Dtype, 0))
+            else:
+                Table = open(os.path.join(self.Path, Name+'.npy'), 'r+b')
+                Table.truncate(len(getNpyHeader(self.Dtype, 0))+Position*self.Dtype.itemsize)
+                Table.seek(0, os.SEEK_END)
+            self.Tables += [Table]
+        self.Nrows = 0 if (Position is None) else Position
+        
+        pass
+    
+    def Write(self,
+              Columns):
+        """
+        Parameters
+        ----------
+        Columns: array
+            Columns of the output table along the first and rows along the
+            second axis.
+        """
+        
+        for i in range(len(self.Tables)):
+            self.Tables[i].write(np.ascontiguousarray(Columns[i], dtype=self.Dtype).tobytes())
+        self.Nrows += Columns.shape[1]
+        
+        pass
+    
+    def Flush(self):
+        """
+        """
+        
+        for Table in self.Tables:
+            Table.flush()
+        
+        pass
+    
+    def Close(self):
+        """
+        """
+        
+        for Table in self.Tables:
+            Table.seek(0)
+            Table.write(getNpyHeader(self.Dtype, self.Nrows))
+            Table.close()
+        
+        pass
+    
+    def Tell(self):
+        """
+        Returns
+        -------
+        Position: int
+            Number of rows of the output table after flushing the files.
+        """
+        
+        self.Flush()
+        
+        return self.Nrows
+
+
+# =============================================================================
+# HDF5WRITER
+# =============================================================================
+
+class HDF5Writer():
+    
+    def __init__(self,
+                 Path,
+                 Names,
+                 Dtype=np.float64,
+                 Position=None):
+        """
+        Parameters
+        ----------
+        Path: str
+            Path of the HDF5 file to which the columns of the output table are
+            written as datasets.
+        Names: list
+            List of str containing the names of the columns.
+        Dtype: type
+            Data type of the columns.
+        Position: int, None
+            Number of rows of an existing output table returned by Tell, at
+            which writing should continue. Everything after it is truncated.
+            If None, a new output table is created.
+        """
+        
+        if (h5py is None):
+            raise ImportError('HDF5Writer requires h5py')
+        
+        self.Path = Path
+        self.Names = Names
+        self.Dtype = np.dtype(Dtype)
+        
+        # Create one resizable dataset per column.
+        if (Position is None):
+            self.Table = h5py.File(self.Path, 'w')
+            for Name in self.Names:
+                self.Table.create_dataset(Name,
+                                          shape=(0,),
+                                          maxshape=(None,),
+                                          dtype=self.Dtype,
+                                          chunks=True)
+        else:
+            self.Table = h5py.File(self.Path, 'a')
+            for Name in self.Names:
+                self.Table[Name].resize((Position,))
+        self.Nrows = 0 if (Position is None) else Position
+        
+        pass
+    
+    def Write(self,
+              Columns):
+        """
+        Parameters
+        ----------
+        Columns: array
+            Columns of the output table along the first and rows along the
+            second axis.
+        """
+        
+        Nrows = self.Nrows+Columns.shape[1]
+        for i in range(len(self.Names)):
+            Dataset = self.Table[self.Names[i]]
+            Dataset.resize((Nrows,))
+            Dataset[self.Nrows:Nrows] = Columns[i]
+        self.Nrows = Nrows
+        
+        pass
+    
+    def Flush(self):
+        """
+        """
+        
+        self.Table.flush()
+        
+        pass
+    
+    def Close(self):
+        """
+        """
+        
+        self.Table.close()
+        
+        pass
+    
+    def Tell(self):
+        """
+        Returns
+        -------
+        Position: int
+            Number of rows of the output table after flushing the file.
+        """
+        
+        self.Flush()
+        
+        return self.Nrows
+
+
+# =============================================================================
+# SQLITEWRITER
+# =============================================================================
+
+class SQLiteWriter():
+    
+    def __init__(self,
+                 Path,
+                 Names,
+                 BufferSize=100000,
+                 Position=None):
+        """
+        Parameters
+        ----------
+        Path: str
+            Path of the SQLite database to which the output table is written
+            as table Photometry.
+        Names: list
+            List of str containing the names of the flux columns.
+        BufferSize: int
+            Number of rows which are buffered before they are inserted in one
+            transaction.
+        Position: int, None
+            Number of rows of an existing output table returned by Tell, at
+            which writing should continue. All later rows are deleted. If
+            None, a new output table is created.
+        """
+        
+        self.Path = Path
+        self.Names = Names
+        self.BufferSize = BufferSize
+        
+        # Each row is identified by the row of the planet in the planet table
+        # and holds the universe and the star of the planet as well as the
+        # fluxes.
+        if (Position is None):
+            if (os.path.exists(self.Path) == True):
+                os.remove(self.Path)
+            self.Connection = sqlite3.connect(self.Path)
+            Columns = ', '.join(['"%s" REAL' % Name for Name in self.Names])
+            self.Connection.execute('CREATE TABLE Photometry (Row INTEGER PRIMARY KEY, Nuniverse INTEGER, Nstar INTEGER, '+Columns+')')
+            self.Connection.commit()
+        else:
+            self.Connection = sqlite3.connect(self.Path)
+            with self.Connection:
+                self.Connection.execute('DELETE FROM Photometry WHERE Row IN (SELECT Row FROM Photometry ORDER BY Row LIMIT -1 OFFSET ?)', (Position,))
+        self.Nrows = 0 if (Position is None) else Position
+        self.Insert = 'INSERT INTO Photometry VALUES ('+', '.join(['?']*(len(self.Names)+3))+')'
+        self.Buffer = []
+        
+        pass
+    
+    def Write(self,
+              Columns,
+              Ids):
+        """
+        Parameters
+        ----------
+        Columns: array
+            Columns of the output table along the first and rows along the
+            second axis.
+        Ids: tuple
+            Row in the planet table, Nuniverse and Nstar of each planet.
+        """
+        
+        Row, Nuniverse, Nstar = Ids
+        self.Nrows += Columns.shape[1]
+        self.Buffer += list(zip(np.asarray(Row, dtype=int).tolist(),
+                                np.asarray(Nuniverse, dtype=int).tolist(),
+                                np.asarray(Nstar, dtype=int).tolist(),
+                                *np.asarray(Columns, dtype=float).tolist()))
+        if (len(self.Buffer) >= self.BufferSize):
+            self.Flush()
+        
+        pass
+    
+    def Flush(self):
+        """
+        """
+        
+        # Insert all buffered rows in one transaction.
+        with self.Connection:
+            self.Connection.executemany(self.Insert, self.Buffer)
+        self.Buffer = []
+        
+        pass
+    
+    def Close(self):
+        """
+        """
+        
+        # The indexes are built once after all rows have been inserted, which
+        # is much faster than updating them with every insert.
+        self.Flush()
+        with self.Connection:
+            for Name in ['Nuniverse', 'Nstar']+self.Names:
+                self.Connection.execute('CREATE INDEX IF NOT EXISTS "Index_%s" ON Photometry ("%s")' % (Name, Name))
+        self.Connection.close()
+        
+        pass
+    
+    def Tell(self):
+        """
+        Returns
+        -------
+        Position: int
+            Number of rows of the output table after inserting the buffered
+            rows.
+        """
+        
+        self.Flush()
+        
+        return self.Nrows
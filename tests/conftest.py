@@ -0,0 +1,227 @@
+"""
+# =============================================================================
+# P-POP PHOTOMETRY
+# A photometry tool for P-POP
+# =============================================================================
+"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+import os
+import pytest
+import sqlite3
+import sys
+
+# The modules of P-pop Photometry are imported from the root of the
+# repository.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PhotometryComputer
+from Filters import Filter
+from Star import Blackbody
+from Planet import Thermal, Reflected
+
+
+# =============================================================================
+# SETUP
+# =============================================================================
+
+# All columns of a planet table in the order of the arguments of System.
+Names = ['Nuniverse', 'Rp', 'Porb', 'Mp', 'ep', 'ip', 'Omegap', 'omegap', 'thetap', 'Abond', 'AgeomVIS', 'AgeomMIR', 'z', 'ap', 'rp', 'AngSep', 'maxAngSep', 'Fp', 'fp', 'Tp', 'Nstar', 'Rs', 'Ms', 'Ts', 'Ds', 'Stype', 'RA', 'Dec']
+
+# Columns of the output planet tables.
+Modules = ['Star.Blackbody', 'Planet.Thermal', 'Planet.Reflected']
+
+# Names of the output planet tables of the synthetic filters.
+Tables = ['MIRI.F560W', 'MIRI.F1000W', 'MIRI.F1500W']
+
+
+# =============================================================================
+# PYTEST
+# =============================================================================
+
+def pytest_configure(config):
+    """
+    Parameters
+    ----------
+    config: instance
+        Configuration of pytest.
+    """
+    
+    # Don't print the deprecation warnings of SciPy for every integral.
+    config.addinivalue_line('filterwarnings', 'ignore::DeprecationWarning')
+    
+    pass
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def writeTable(Path,
+               Nuniverse=5,
+               Nstar=12,
+               Seed=1):
+    """
+    Parameters
+    ----------
+    Path: str
+        Path of the synthetic planet table.
+    Nuniverse: int
+        Number of universes.
+    Nstar: int
+        Number of stars, which appear in every universe.
+    Seed: int
+        Seed of the random number generator.
+    """
+    
+    # Each star has zero to three planets in each universe.
+    rng = np.random.default_rng(Seed)
+    Stars = [(rng.uniform(0.2, 1.5), rng.uniform(0.2, 1.4), rng.uniform(3000., 7000.), rng.uniform(1., 20.), rng.choice(['F', 'G', 'K', 'M'])) for i in range(Nstar)]
+    Table = open(Path, 'w')
+    Table.write('\t'.join(Names[:5])+'\t\n')
+    Table.write('\t'.join(Names)+'\t\n')
+    for i in range(Nuniverse):
+        for j in range(Nstar):
+            Rs, Ms, Ts, Ds, Stype = Stars[j]
+            for k in range(rng.integers(0, 4)):
+                Line = {'Nuniverse': i, 'Rp': rng.uniform(0.5, 10.), 'Porb': rng.uniform(1., 500.), 'Mp': rng.uniform(0.1, 100.), 'ep': 0., 'ip': rng.uniform(0., 3.), 'Omegap': 1., 'omegap': 1., 'thetap': 1., 'Abond': 0.3, 'AgeomVIS': rng.uniform(0.1, 0.6), 'AgeomMIR': rng.uniform(0.05, 0.3), 'z': 1., 'ap': rng.uniform(0.1, 2.), 'rp': rng.uniform(0.1, 2.), 'AngSep': 0.1, 'maxAngSep': 0.2, 'Fp': 1., 'fp': rng.uniform(0., 0.3), 'Tp': rng.uniform(150., 900.), 'Nstar': j, 'Rs': Rs, 'Ms': Ms, 'Ts': Ts, 'Ds': Ds, 'Stype': Stype, 'RA': 10., 'Dec': -10.}
+                Table.write('\t'.join([str(Line[Name]) if (Name in ['Nuniverse', 'Nstar', 'Stype']) else '%.5f' % Line[Name] for Name in Names])+'\t\n')
+    Table.close()
+    
+    pass
+
+def getFilters():
+    """
+    Returns
+    -------
+    Filters: list
+        List of instances of class Filter with a trapezoidal transmission in
+        the mid-infrared.
+    """
+    
+    Filters = []
+    for Name, Mean, Width, Nnodes in [('Test/MIRI.F560W', 5.6e-6, 1.2e-6, 120), ('Test/MIRI.F1000W', 10e-6, 2e-6, 160), ('Test/MIRI.F1500W', 15e-6, 3e-6, 201)]:
+        Wavel = np.linspace(Mean-1.5*Width, Mean+1.5*Width, Nnodes) # m
+        Trans = 0.4*np.clip(1.2-np.abs(Wavel-Mean)/(0.5*Width), 0., 1.)
+        Filters += [Filter.Filter(Name, Wavel, Trans)]
+    
+    return Filters
+
+def makeComputer(PathPlanetTable,
+                 Filters=None,
+                 Unit='uJy',
+                 Mission='MIR',
+                 **kwargs):
+    """
+    Parameters
+    ----------
+    PathPlanetTable: str, None
+        Path of the planet table.
+    Filters: list, None
+        List of instances of class Filter. If None, the synthetic filters are
+        used.
+    Unit: 'uJy', 'ph', list
+        Unit in which the photometry should be computed.
+    Mission: 'MIR', 'VIS', list
+        Wavelength range in which the mission is operating.
+    kwargs:
+        Further keyword arguments of class PhotometryComputer.
+    
+    Returns
+    -------
+    PhotComp: instance
+        Instance of class PhotometryComputer with the Blackbody, Thermal and
+        Reflected modules.
+    """
+    
+    if (Filters is None):
+        Filters = getFilters()
+    PhotComp = PhotometryComputer.PhotometryComputer(PathPlanetTable,
+                                                     Filters,
+                                                     [Blackbody],
+                                                     [Thermal, Reflected],
+                                                     Unit,
+                                                     Mission,
+                                                     False,
+                                                     None,
+                                                     False,
+                                                     **kwargs)
+    
+    return PhotComp
+
+def readOutput(PathBase,
+               Table,
+               Output='npy'):
+    """
+    Parameters
+    ----------
+    PathBase: str
+        Path of the planet table without the extensions.
+    Table: str
+        Name of the output planet table without the planet table.
+    Output: 'txt', 'npy', 'sqlite'
+        Format of the output planet table.
+    
+    Returns
+    -------
+    Columns: array
+        Columns of the output planet table along the first and planets along
+        the second axis. The SQLite database also holds the row in the
+        planet table, Nuniverse and Nstar in the first three columns.
+    """
+    
+    if (Output == 'txt'):
+        return np.loadtxt(PathBase+'_'+Table+'.txt', skiprows=2, ndmin=2).T
+    if (Output == 'sqlite'):
+        Connection = sqlite3.connect(PathBase+'_'+Table+'.sqlite')
+        Rows = Connection.execute('SELECT * FROM Photometry ORDER BY Row').fetchall()
+        Connection.close()
+        return np.array(Rows, dtype=float).reshape(-1, len(Modules)+3).T
+    
+    return np.array([np.load(os.path.join(PathBase+'_'+Table+'_npy', Module+'.npy')) for Module in Modules])
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def table(tmp_path):
+    """
+    Returns
+    -------
+    Path: str
+        Path of a fresh copy of the synthetic planet table.
+    """
+    
+    Path = str(tmp_path/'Pop.txt')
+    writeTable(Path)
+    
+    return Path
+
+@pytest.fixture(scope='session')
+def reference(tmp_path_factory):
+    """
+    Returns
+    -------
+    Reference: dict
+        Columns of the output planet tables of the system by system reference
+        path for each synthetic filter, and the Nuniverse column.
+    """
+    
+    Path = str(tmp_path_factory.mktemp('reference')/'Pop.txt')
+    writeTable(Path)
+    makeComputer(Path,
+                 BlockSize=None,
+                 Output='npy').Run()
+    Reference = {}
+    for Table in Tables:
+        Reference[Table] = readOutput(Path[:-4], Table)
+    Reference['Nuniverse'] = np.loadtxt(Path, skiprows=2, usecols=0, dtype=int)
+    
+    return Reference
@@ -0,0 +1,196 @@
+"""
+# =============================================================================
+# P-POP PHOTOMETRY
+# A photometry tool for P-POP
+# =============================================================================
+"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+import os
+import pytest
+
+from conftest import Modules, Tables, makeComputer, readOutput
+
+
+# =============================================================================
+# OUTPUT FORMATS
+# =============================================================================
+
+def test_txt(table,
+             reference):
+    
+    # The text tables are written with 12 decimals.
+    makeComputer(table,
+                 Output='txt').Run()
+    for Table in Tables:
+        np.testing.assert_allclose(readOutput(table[:-4], Table, 'txt'), reference[Table], rtol=1e-10, atol=1e-12)
+
+def test_sqlite(table,
+                reference):
+    
+    makeComputer(table,
+                 Output='sqlite').Run()
+    Nplanets = len(reference['Nuniverse'])
+    for Table in Tables:
+        Columns = readOutput(table[:-4], Table, 'sqlite')
+        assert np.array_equal(Columns[0], np.arange(Nplanets))
+        assert np.array_equal(Columns[1], reference['Nuniverse'])
+        np.testing.assert_allclose(Columns[3:], reference[Table], rtol=1e-10)
+
+def test_wide(table,
+              reference):
+    
+    makeComputer(table,
+                 Wide=True,
+                 Output='npy').Run()
+    for Table in Tables:
+        for i in range(len(Modules)):
+            Column = np.load(os.path.join(table[:-4]+'_photometry_npy', Modules[i]+'_'+Table+'.npy'))
+            np.testing.assert_allclose(Column, reference[Table][i], rtol=1e-10)
+        assert os.path.exists(table[:-4]+'_'+Table+'_npy') == False
+
+def test_hdf5(table,
+              reference):
+    
+    h5py = pytest.importorskip('h5py')
+    makeComputer(table,
+                 Output='hdf5').Run()
+    for Table in Tables:
+        with h5py.File(table[:-4]+'_'+Table+'.hdf5', 'r') as File:
+            Columns = np.array([File[Module][:] for Module in Modules])
+        np.testing.assert_allclose(Columns, reference[Table], rtol=1e-10)
+
+
+# =============================================================================
+# CHECKPOINTS
+# =============================================================================
+
+class Interrupt(Exception):
+    pass
+
+def interrupt(PhotComp,
+              Nsystems):
+    """
+    Parameters
+    ----------
+    PhotComp: instance
+        Instance of class PhotometryComputer.
+    Nsystems: int
+        Number of blocks of systems after which the run is interrupted.
+    """
+    
+    # Simulate a killed process, which flushes what has been written so far
+    # but never closes the output tables.
+    nextSystem = PhotComp.nextSystem
+    Count = [0]
+    def killedSystem():
+        Count[0] += 1
+        if (Count[0] > Nsystems):
+            for Writer in PhotComp.Writers.values():
+                Writer.Flush()
+            PhotComp.closeWriters = lambda i=None: None
+            raise Interrupt()
+        return nextSystem()
+    PhotComp.nextSystem = killedSystem
+    
+    pass
+
+# The runs with SinglePass = False are interrupted after the first filter is
+# done.
+Resumes = [({}, 'npy', 5),
+           ({'SinglePass': False}, 'npy', 20),
+           ({'Stream': True}, 'npy', 5),
+           ({'Stream': True, 'SinglePass': False}, 'npy', 20),
+           ({'Cache': True}, 'npy', 5),
+           ({'Universes': [3, 1]}, 'npy', 3),
+           ({'Universes': [3, 1], 'Stream': True, 'SinglePass': False}, 'npy', 8),
+           ({}, 'txt', 5),
+           ({'SinglePass': False}, 'txt', 20),
+           ({}, 'sqlite', 5),
+           ({'SinglePass': False}, 'sqlite', 20)]
+
+@pytest.mark.parametrize('kwargs, Output, Nsystems', Resumes)
+def test_resume(table,
+                reference,
+                kwargs,
+                Output,
+                Nsystems):
+    
+    PhotComp = makeComputer(table,
+                            BlockSize=7,
+                            Checkpoint=0.,
+                            Output=Output,
+                            **kwargs)
+    interrupt(PhotComp,
+              Nsystems)
+    with pytest.raises(Interrupt):
+        PhotComp.Run()
+    assert os.path.exists(PhotComp.PathCheckpoint) == True
+    if (PhotComp.SinglePass == False):
+        assert PhotComp.Finished[0] == True and PhotComp.Finished[-1] == False
+    
+    # The resumed run continues from the checkpoint and removes it once it is
+    # complete.
+    PhotComp = makeComputer(table,
+                            BlockSize=7,
+                            Checkpoint=0.,
+                            Resume=True,
+                            Output=Output,
+                            **kwargs)
+    PhotComp.Run()
+    assert os.path.exists(PhotComp.PathCheckpoint) == False
+    Rows = np.isin(reference['Nuniverse'], kwargs.get('Universes', reference['Nuniverse']))
+    for Table in Tables:
+        Columns = readOutput(table[:-4], Table, Output)
+        if (Output == 'sqlite'):
+            assert np.array_equal(Columns[0], np.arange(len(Rows))[Rows])
+            Columns = Columns[3:]
+        np.testing.assert_allclose(Columns, reference[Table][:, Rows], rtol=1e-10, atol=1e-12)
+
+def test_resume_wide(table,
+                     reference):
+    
+    PhotComp = makeComputer(table,
+                            BlockSize=7,
+                            Checkpoint=0.,
+                            Wide=True,
+                            Output='npy')
+    interrupt(PhotComp,
+              5)
+    with pytest.raises(Interrupt):
+        PhotComp.Run()
+    makeComputer(table,
+                 BlockSize=7,
+                 Checkpoint=0.,
+                 Wide=True,
+                 Resume=True,
+                 Output='npy').Run()
+    for Table in Tables:
+        for i in range(len(Modules)):
+            Column = np.load(os.path.join(table[:-4]+'_photometry_npy', Modules[i]+'_'+Table+'.npy'))
+            np.testing.assert_allclose(Column, reference[Table][i], rtol=1e-10)
+
+def test_resume_mismatch(table,
+                         reference):
+    
+    # A checkpoint of different settings is ignored.
+    PhotComp = makeComputer(table,
+                            BlockSize=7,
+                            Checkpoint=0.,
+                            Output='npy')
+    interrupt(PhotComp,
+              5)
+    with pytest.raises(Interrupt):
+        PhotComp.Run()
+    makeComputer(table,
+                 BlockSize=7,
+                 Checkpoint=0.,
+                 Resume=True,
+                 Output='txt').Run()
+    for Table in Tables:
+        np.testing.assert_allclose(readOutput(table[:-4], Table, 'txt'), reference[Table], rtol=1e-10, atol=1e-12)
@@ -0,0 +1,266 @@
+"""
+# =============================================================================
+# P-POP PHOTOMETRY
+# A photometry tool for P-POP
+# =============================================================================
+"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import bz2
+import gzip
+import lzma
+import numpy as np
+import os
+import pytest
+import shutil
+
+from conftest import Tables, getFilters, makeComputer, readOutput
+import PhotometryComputer
+import SystemReader
+from Filters import Filter, TopHat
+from Star import Blackbody
+from Planet import Thermal, Reflected
+
+
+# =============================================================================
+# MODES
+# =============================================================================
+
+# Each mode is compared to the system by system reference path (BlockSize =
+# None) with the given relative tolerance.
+Modes = [({}, 1e-10),
+         ({'BlockSize': 7}, 1e-10),
+         ({'BlockSize': 1}, 1e-10),
+         ({'SinglePass': False}, 1e-10),
+         ({'MasterGrid': True}, 1e-10),
+         ({'MasterGrid': True, 'BlockSize': 7}, 1e-10),
+         ({'Stream': True}, 1e-10),
+         ({'Stream': True, 'BlockSize': None}, 1e-10),
+         ({'Stream': True, 'BlockSize': 7, 'SinglePass': False}, 1e-10),
+         ({'MemoryBudget': 0.05}, 1e-10),
+         ({'LUTtol': 1e-8}, 1e-7),
+         ({'NodeTol': 1e-8}, 1e-7),
+         ({'NodeTol': 1e-8, 'LUTtol': 1e-8, 'MasterGrid': True}, 1e-7),
+         ({'Float32': True}, 1e-5),
+         ({'Float32': True, 'BlockSize': None}, 1e-5),
+         ({'Float32': True, 'MasterGrid': True, 'Stream': True}, 1e-5)]
+
+@pytest.mark.parametrize('kwargs, rtol', Modes)
+def test_mode(table,
+              reference,
+              kwargs,
+              rtol):
+    
+    makeComputer(table,
+                 Output='npy',
+                 **kwargs).Run()
+    for Table in Tables:
+        np.testing.assert_allclose(readOutput(table[:-4], Table), reference[Table], rtol=rtol)
+
+@pytest.mark.parametrize('kwargs', [{}, {'BlockSize': None}, {'Stream': True}, {'Float32': True}])
+def test_cache(table,
+               reference,
+               kwargs):
+    
+    # The first run writes the cache and the second one memory-maps it.
+    for i in range(2):
+        PhotComp = makeComputer(table,
+                                Cache=True,
+                                Output='npy',
+                                **kwargs)
+        assert PhotComp.SysRdr.Cached == True
+        PhotComp.Run()
+        rtol = 1e-5 if ('Float32' in kwargs) else 1e-10
+        for Table in Tables:
+            np.testing.assert_allclose(readOutput(table[:-4], Table), reference[Table], rtol=rtol)
+    
+    # The cache holds the same columns as the planet table.
+    Reader = SystemReader.SystemReader(table)
+    Reader.Open()
+    Data = Reader.getData()
+    for Name in Reader.Names:
+        Column = np.load(os.path.join(table[:-4]+'_cache', Name+'.npy'))
+        if (Data[Name].dtype.kind == 'f'):
+            assert np.array_equal(Column, Data[Name].astype(PhotComp.Dtype))
+        else:
+            assert np.array_equal(Column, Data[Name])
+
+@pytest.mark.parametrize('Compression, Module', [('.gz', gzip), ('.bz2', bz2), ('.xz', lzma)])
+@pytest.mark.parametrize('Stream', [False, True])
+def test_compression(table,
+                     reference,
+                     Compression,
+                     Module,
+                     Stream):
+    
+    with open(table, 'rb') as Table, Module.open(table+Compression, 'wb') as Compressed:
+        shutil.copyfileobj(Table, Compressed)
+    os.remove(table)
+    makeComputer(table+Compression,
+                 Stream=Stream,
+                 BlockSize=7,
+                 Output='npy').Run()
+    for Table in Tables:
+        np.testing.assert_allclose(readOutput(table[:-4], Table), reference[Table], rtol=1e-10)
+
+def test_stream_without_index(table):
+    
+    # A fresh streaming run reads the planet table only once and doesn't
+    # write an index.
+    makeComputer(table,
+                 Stream=True).Run()
+    assert os.path.exists(table[:-4]+'_index.npz') == False
+
+
+# =============================================================================
+# UNIVERSES
+# =============================================================================
+
+@pytest.mark.parametrize('kwargs', [{}, {'BlockSize': None}, {'Stream': True}, {'Stream': True, 'BlockSize': None}, {'Cache': True}, {'SinglePass': False}])
+def test_universes(table,
+                   reference,
+                   kwargs):
+    
+    makeComputer(table,
+                 Universes=[3, 1],
+                 Output='npy',
+                 **kwargs).Run()
+    Rows = np.isin(reference['Nuniverse'], [1, 3])
+    for Table in Tables:
+        np.testing.assert_allclose(readOutput(table[:-4], Table), reference[Table][:, Rows], rtol=1e-10)
+    
+    # The index is only needed to seek the selected systems in streaming
+    # mode.
+    assert os.path.exists(table[:-4]+'_index.npz') == ('Stream' in kwargs)
+
+
+# =============================================================================
+# UNITS AND MISSIONS
+# =============================================================================
+
+def test_units(table,
+               reference):
+    
+    # Repeated units are only computed once.
+    PhotComp = makeComputer(table,
+                            Unit=['uJy', 'ph', 'uJy'],
+                            Mission=['MIR', 'VIS'],
+                            Output='npy')
+    assert PhotComp.Units == ['uJy', 'ph']
+    assert PhotComp.Combos == [('uJy', 'MIR'), ('uJy', 'VIS'), ('ph', 'MIR'), ('ph', 'VIS')]
+    PhotComp.Run()
+    for Table in Tables:
+        np.testing.assert_allclose(readOutput(table[:-4], Table+'_uJy_MIR'), reference[Table], rtol=1e-10)
+    
+    # The photon flux agrees with the system by system path.
+    makeComputer(table,
+                 Unit='ph',
+                 BlockSize=None,
+                 Output='npy').Run()
+    for Table in Tables:
+        np.testing.assert_allclose(readOutput(table[:-4], Table+'_ph_MIR'), readOutput(table[:-4], Table), rtol=1e-10)
+
+def test_tophat(table,
+                tmp_path):
+    
+    # The analytic integral of the top-hat bins agrees with the quadrature on
+    # the filter nodes of the system by system path.
+    Columns = []
+    for kwargs in [{'BlockSize': None}, {}, {'MasterGrid': True}, {'NodeTol': 1e-8}, {'Float32': True}]:
+        Path = str(tmp_path/('%.0f' % len(Columns)))
+        os.makedirs(Path)
+        shutil.copy(table, Path)
+        Filters = [TopHat.TopHat('Test/Bin1', 4e-6, 5e-6), TopHat.TopHat('Test/Bin2', 10e-6, 12e-6)]
+        makeComputer(os.path.join(Path, 'Pop.txt'),
+                     Filters=Filters,
+                     Output='npy',
+                     **kwargs).Run()
+        Columns += [[readOutput(os.path.join(Path, 'Pop'), Name) for Name in ['Bin1', 'Bin2']]]
+    for i in range(1, len(Columns)):
+        for j in range(2):
+            np.testing.assert_allclose(Columns[i][j], Columns[0][j], rtol=1e-5 if (i == len(Columns)-1) else 1e-8)
+
+
+# =============================================================================
+# SINGLE PRECISION
+# =============================================================================
+
+def test_float32_visible(table):
+    
+    # The thermal emission of cool planets in the visible underflows in single
+    # precision, which must not fail the validation.
+    Wavel = np.linspace(0.45e-6, 0.65e-6, 150) # m
+    Trans = np.clip(1.2-np.abs(Wavel-0.55e-6)/0.05e-6, 0., 1.)
+    for kwargs in [{}, {'BlockSize': None}, {'MasterGrid': True}]:
+        PhotComp = makeComputer(table,
+                                Filters=[Filter.Filter('Test/ZIMPOL_V', Wavel, Trans)],
+                                Unit=['uJy', 'ph'],
+                                Mission='VIS',
+                                Float32=True,
+                                **kwargs)
+        assert PhotComp.Float32Err < 1e-5
+
+def test_float32_error(table,
+                       monkeypatch):
+    
+    # A broken single precision computation is detected.
+    Compute = PhotometryComputer.PhotometryComputer.Compute
+    def brokenCompute(self,
+                      Systems,
+                      Dtype=None):
+        Fluxes = Compute(self, Systems, Dtype)
+        if (Dtype == np.float32):
+            Fluxes = {Combo: (Fluxes[Combo][0], 1.1*Fluxes[Combo][1]) for Combo in Fluxes.keys()}
+        return Fluxes
+    monkeypatch.setattr(PhotometryComputer.PhotometryComputer, 'Compute', brokenCompute)
+    with pytest.raises(ValueError):
+        makeComputer(table,
+                     Float32=True)
+
+
+# =============================================================================
+# IN-MEMORY API
+# =============================================================================
+
+@pytest.mark.parametrize('kwargs, rtol', [({}, 1e-10), ({'BlockSize': None}, 1e-10), ({'MasterGrid': True}, 1e-10), ({'LUTtol': 1e-8, 'NodeTol': 1e-8}, 1e-7), ({'Float32': True}, 1e-5)])
+def test_compute(table,
+                 reference,
+                 kwargs,
+                 rtol):
+    
+    Reader = SystemReader.SystemReader(table)
+    Reader.Open()
+    Reader.setColumns(None)
+    Columns = Reader.getData()
+    
+    # The filters which are passed in are not modified.
+    Filters = getFilters()
+    Fluxes = PhotometryComputer.computePhotometry(Columns,
+                                                  Filters,
+                                                  [Blackbody],
+                                                  [Thermal, Reflected],
+                                                  **kwargs)
+    for i in range(len(Filters)):
+        assert len(Filters[i].LUT) == 0 and len(Filters[i].StarCache) == 0
+        assert Filters[i].Kernel is Filters[i].FullKernel
+    Fstar, Fplanet = Fluxes[('uJy', 'MIR')]
+    for i in range(len(Tables)):
+        np.testing.assert_allclose(np.concatenate((Fstar[:, i], Fplanet[:, i])), reference[Tables[i]], rtol=rtol)
+    
+    # Systems (or blocks of systems) can also be passed one by one.
+    Reader.Reset()
+    if (kwargs.get('BlockSize', 10000) is None):
+        Systems = iter(Reader.nextSystem, None)
+    else:
+        Systems = iter(lambda: Reader.nextBlock(20), None)
+    Fstar, Fplanet = PhotometryComputer.computePhotometry(Systems,
+                                                          getFilters(),
+                                                          [Blackbody],
+                                                          [Thermal, Reflected],
+                                                          **kwargs)[('uJy', 'MIR')]
+    for i in range(len(Tables)):
+        np.testing.assert_allclose(np.concatenate((Fstar[:, i], Fplanet[:, i])), reference[Tables[i]], rtol=rtol)